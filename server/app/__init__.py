@@ -1,22 +1,25 @@
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
 
+from . import middleware
 from .routes import api_bp, page_bp
 
 
 def create_app() -> Flask:
     app = Flask(
         __name__,
-        static_folder="static",
+        static_folder=None,
         template_folder="templates",
     )
+    app.static_folder = "static"
     CORS(app)
+    middleware.init_app(app)
 
     app.register_blueprint(page_bp)
     app.register_blueprint(api_bp, url_prefix="/api")
 
-    @app.route("/static/<path:filename>")
+    @app.route("/static/<path:filename>", endpoint="static")
     def static_files(filename: str):
-        return send_from_directory(app.static_folder, filename)
+        return middleware.send_static_asset(filename)
 
     return app
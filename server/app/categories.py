@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+from .models import TrainCategory, Vehicle
+
+VEHICLES: Dict[str, Vehicle] = {
+    vehicle.id: vehicle
+    for vehicle in (
+        Vehicle(id="4024", name="ÖBB 4024 Talent", max_speed_kmh=140, acceleration="high"),
+        Vehicle(id="4746", name="ÖBB 4746 Cityjet", max_speed_kmh=160, acceleration="medium"),
+        Vehicle(id="RJ", name="Railjet (1116 + 7 Wagen)", max_speed_kmh=230, acceleration="medium"),
+        Vehicle(id="1116-GZ", name="1116 mit Güterwagen", max_speed_kmh=120, acceleration="low"),
+    )
+}
+
+CATEGORIES: Dict[str, TrainCategory] = {
+    category.id: category
+    for category in (
+        TrainCategory(
+            id="S",
+            name="S-Bahn",
+            vehicle=VEHICLES["4024"],
+            max_speed_kmh=140,
+            default_dwell_minutes=1.0,
+            number_base=6300,
+        ),
+        TrainCategory(
+            id="REX",
+            name="Regionalexpress",
+            vehicle=VEHICLES["4746"],
+            max_speed_kmh=160,
+            default_dwell_minutes=1.5,
+            number_base=1900,
+        ),
+        TrainCategory(
+            id="RJ",
+            name="Railjet",
+            vehicle=VEHICLES["RJ"],
+            max_speed_kmh=230,
+            default_dwell_minutes=2.0,
+            number_base=540,
+            min_stop_spacing_km=40.0,
+        ),
+        TrainCategory(
+            id="RJX",
+            name="Railjet Xpress",
+            vehicle=VEHICLES["RJ"],
+            max_speed_kmh=230,
+            default_dwell_minutes=2.0,
+            number_base=760,
+            min_stop_spacing_km=100.0,
+        ),
+        TrainCategory(
+            id="GZ",
+            name="Güterzug",
+            vehicle=VEHICLES["1116-GZ"],
+            max_speed_kmh=100,
+            default_dwell_minutes=0.0,
+            number_base=45000,
+            stops_by_default=False,
+        ),
+    )
+}
+
+
+def list_vehicles() -> List[Vehicle]:
+    return list(VEHICLES.values())
+
+
+def list_categories() -> List[TrainCategory]:
+    return list(CATEGORIES.values())
+
+
+def get_category(category_id: Optional[str]) -> Optional[TrainCategory]:
+    if not category_id:
+        return None
+    return CATEGORIES.get(category_id)
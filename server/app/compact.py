@@ -0,0 +1,152 @@
+"""Compact wire format for timetables.
+
+Instead of one object per entry with ISO timestamps and station names, a
+compact timetable carries::
+
+    base           ISO timestamp of the first arrival/departure
+    stations       delta-encoded indices into ``route.stations``
+    times          arrival/departure pairs, flattened; each value is the
+                   offset in seconds from the previous non-null time (an
+                   integer unless the times carry fractions of a second),
+                   ``null`` where the entry has no time
+    pass_through   entry indices run without a stop
+    tracks, remarks  sparse ``{entry index: value}`` maps
+    overrides      ``{entry index: [station_id, station_name]}`` for entries
+                   that do not match the route's station at their index
+
+Station IDs and names are taken from the route, which clients already hold
+from ``/api/routes``.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Union
+
+from flask import request
+
+from .models import Route, Timetable, TimetableEntry
+
+COMPACT_MIMETYPE = "application/vnd.buchfahrplan.compact+json"
+# Microseconds, the resolution of ``datetime``: times decode to exactly what
+# was encoded. Whole seconds still go over the wire as integers.
+_TICKS_PER_SECOND = 1_000_000
+_TICK = timedelta(microseconds=1)
+
+
+def wants_compact() -> bool:
+    """``?format=compact`` or an ``Accept`` header preferring the compact type."""
+    if "format" in request.args:
+        return request.args["format"] == "compact"
+    best = request.accept_mimetypes.best_match(["application/json", COMPACT_MIMETYPE])
+    return best == COMPACT_MIMETYPE
+
+
+def encode_timetable(timetable: Timetable, route: Optional[Route]) -> Dict[str, Any]:
+    positions: Dict[str, int] = {}
+    for idx, station in enumerate(route.stations if route else []):
+        positions.setdefault(station.id, idx)
+
+    station_deltas: List[int] = []
+    times: List[Optional[Union[int, float]]] = []
+    pass_through: List[int] = []
+    tracks: Dict[str, str] = {}
+    remarks: Dict[str, str] = {}
+    overrides: Dict[str, List[str]] = {}
+
+    base: Optional[datetime] = None
+    previous_pos = 0
+    previous_ticks = 0
+    for idx, entry in enumerate(timetable.entries):
+        pos = positions.get(entry.station_id)
+        if pos is None or route.stations[pos].name != entry.station_name:
+            overrides[str(idx)] = [entry.station_id, entry.station_name]
+        if pos is not None:
+            station_deltas.append(pos - previous_pos)
+            previous_pos = pos
+        else:
+            station_deltas.append(0)
+
+        for value in (entry.arrival, entry.departure):
+            if value is None:
+                times.append(None)
+                continue
+            if base is None:
+                base = value
+            ticks = (value - base) // _TICK
+            times.append(_seconds(ticks - previous_ticks))
+            previous_ticks = ticks
+
+        if entry.pass_through:
+            pass_through.append(idx)
+        if entry.track:
+            tracks[str(idx)] = entry.track
+        if entry.remarks:
+            remarks[str(idx)] = entry.remarks
+
+    return {
+        "id": timetable.id,
+        "route_id": timetable.route_id,
+        "train_number": timetable.train_number,
+        "title": timetable.title,
+        "category_id": timetable.category_id,
+        "base": base.isoformat() if base else None,
+        "stations": station_deltas,
+        "times": times,
+        "pass_through": pass_through,
+        "tracks": tracks,
+        "remarks": remarks,
+        "overrides": overrides,
+    }
+
+
+def decode_timetable(data: Dict[str, Any], route: Optional[Route]) -> Timetable:
+    stations = route.stations if route else []
+    overrides = data.get("overrides", {})
+    tracks = data.get("tracks", {})
+    remarks = data.get("remarks", {})
+    pass_through = set(data.get("pass_through", []))
+
+    moments: List[Optional[datetime]] = []
+    base = datetime.fromisoformat(data["base"]) if data.get("base") else None
+    ticks = 0
+    for offset in data["times"]:
+        if offset is None or base is None:
+            moments.append(None)
+            continue
+        ticks += round(offset * _TICKS_PER_SECOND)
+        moments.append(base + ticks * _TICK)
+
+    entries: List[TimetableEntry] = []
+    for idx, pos in enumerate(accumulate(data["stations"])):
+        key = str(idx)
+        if key in overrides:
+            station_id, station_name = overrides[key]
+        else:
+            station_id, station_name = stations[pos].id, stations[pos].name
+        entries.append(
+            TimetableEntry(
+                station_id=station_id,
+                station_name=station_name,
+                arrival=moments[2 * idx],
+                departure=moments[2 * idx + 1],
+                track=tracks.get(key),
+                remarks=remarks.get(key),
+                pass_through=idx in pass_through,
+            )
+        )
+
+    return Timetable(
+        id=data["id"],
+        route_id=data["route_id"],
+        train_number=data["train_number"],
+        title=data["title"],
+        entries=entries,
+        category_id=data.get("category_id"),
+    )
+
+
+def _seconds(ticks: int) -> Union[int, float]:
+    if ticks % _TICKS_PER_SECOND == 0:
+        return ticks // _TICKS_PER_SECOND
+    return ticks / _TICKS_PER_SECOND
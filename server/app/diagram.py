@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import math
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .models import Route, Station, Timetable
+
+MINUTE_STEP = 5
+MAJOR_MINUTE_STEP = 15
+
+
+def collect_run_points(timetable: Timetable, station_index: Dict[str, Station]) -> List[Tuple[datetime, float]]:
+    points: List[Tuple[datetime, float]] = []
+    for entry in timetable.entries:
+        station = station_index.get(entry.station_id)
+        if not station:
+            continue
+        kilometer = station.kilometer
+        if entry.departure:
+            points.append((entry.departure, kilometer))
+        if entry.arrival:
+            points.append((entry.arrival, kilometer))
+    points.sort(key=lambda item: item[0])
+    return points
+
+
+def time_bounds(timetable: Timetable) -> Tuple[datetime, datetime]:
+    times: List[datetime] = []
+    for entry in timetable.entries:
+        if entry.arrival:
+            times.append(entry.arrival)
+        if entry.departure:
+            times.append(entry.departure)
+    if not times:
+        now = datetime.now()
+        return now, now + timedelta(minutes=10)
+    start = min(times)
+    end = max(times)
+    if start == end:
+        end = start + timedelta(minutes=10)
+    return start, end
+
+
+def km_bounds(route: Route) -> Tuple[float, float]:
+    return km_range(station.kilometer for station in route.stations)
+
+
+def km_range(values: Iterable[float]) -> Tuple[float, float]:
+    kilometers = list(values)
+    if not kilometers:
+        return 0.0, 1.0
+    min_km = min(kilometers)
+    max_km = max(kilometers)
+    if min_km == max_km:
+        max_km += 1.0
+    return min_km, max_km
+
+
+def km_to_y(km: float, min_km: float, max_km: float, bottom: float, top: float) -> float:
+    ratio = (km - min_km) / max(max_km - min_km, 0.5)
+    return bottom + ratio * (top - bottom)
+
+
+def total_minutes(start_time: datetime, end_time: datetime) -> float:
+    return max((end_time - start_time).total_seconds() / 60, 1.0)
+
+
+def time_to_x(time_point: datetime, start_time: datetime, minutes: float, left: float, right: float) -> float:
+    ratio = min(max((time_point - start_time).total_seconds() / 60 / minutes, 0), 1)
+    return left + ratio * (right - left)
+
+
+def time_ticks(start_time: datetime, end_time: datetime) -> Iterator[Tuple[float, bool, str]]:
+    """Yields ``(ratio, is_major, label)`` for every 5-minute grid line."""
+    minutes = total_minutes(start_time, end_time)
+    total_steps = int(math.ceil(minutes / MINUTE_STEP))
+    for idx in range(total_steps + 1):
+        minute = idx * MINUTE_STEP
+        is_major = minute % MAJOR_MINUTE_STEP == 0 or idx == 0 or idx == total_steps
+        label_dt = end_time if idx == total_steps else start_time + timedelta(minutes=minute)
+        yield min(minute / minutes, 1), is_major, label_dt.strftime("%H:%M")
+
+
+def speed_color(speed: int) -> str:
+    if speed >= 230:
+        return "#1d4ed8"
+    if speed >= 200:
+        return "#2563eb"
+    if speed >= 160:
+        return "#3b82f6"
+    if speed >= 120:
+        return "#0ea5e9"
+    if speed >= 80:
+        return "#10b981"
+    return "#f97316"
+
+
+def format_gradient(value: Optional[int]) -> str:
+    if value is None:
+        return "0‰"
+    return f"{'+' if value > 0 else ''}{value}‰"
+
+
+def duration_text(start: datetime, end: datetime) -> str:
+    minutes = int((end - start).total_seconds() / 60)
+    hours, mins = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {mins}m"
+    return f"{mins} Minuten"
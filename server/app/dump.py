@@ -0,0 +1,528 @@
+"""Binary dump format for everything the storage holds.
+
+Layout (all integers little-endian)::
+
+    header    magic "BFPD", version, then (offset, count) for every section
+    routes    fixed-width records, each pointing at a run of stations/segments
+    stations  fixed-width records
+    segments  fixed-width records
+    timetables fixed-width records, each pointing at a run of entries
+    entries   fixed-width records
+    route_index, timetable_index
+              (string ID, record index) pairs sorted by the ID's UTF-8 bytes
+    str_index u64 start offset per string, plus one end offset
+    str_data  UTF-8 bytes of all strings
+    meta      JSON (ID counters)
+
+Text fields are stored as indices into the string table. Sections are
+written to temporary files while streaming and concatenated at the end, so
+neither export nor import holds the dataset in memory; ``DumpReader`` maps
+the file and only decodes the records that are asked for; lookups by ID
+binary-search the index sections in place.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import shutil
+import struct
+import tempfile
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .models import Route, Station, Timetable, TimetableEntry, TrackSegment
+
+MAGIC = b"BFPD"
+VERSION = 1
+CHUNK_SIZE = 1 << 16
+
+_SECTIONS = (
+    "routes",
+    "stations",
+    "segments",
+    "timetables",
+    "entries",
+    "route_index",
+    "timetable_index",
+    "str_index",
+    "str_data",
+    "meta",
+)
+_HEADER = struct.Struct("<4sHH" + "QQ" * len(_SECTIONS))
+_ROUTE = struct.Struct("<IIIIiQIQII")
+_STATION = struct.Struct("<IIdi")
+_SEGMENT = struct.Struct("<IddiiI")
+_TIMETABLE = struct.Struct("<IIIIQII")
+_ENTRY = struct.Struct("<IIqqhhIIB")
+_OFFSET = struct.Struct("<Q")
+_INDEX = struct.Struct("<II")
+_RECORDS = {
+    "routes": _ROUTE,
+    "stations": _STATION,
+    "segments": _SEGMENT,
+    "timetables": _TIMETABLE,
+    "entries": _ENTRY,
+}
+# Index section for the records of each section that can be looked up by ID.
+_INDEXES = {"routes": "route_index", "timetables": "timetable_index"}
+
+_NO_STRING = 0xFFFFFFFF
+_NO_INT = -(2**31)
+_NO_TIME = -(2**63)
+_NAIVE = -(2**15)
+_EPOCH = datetime(1970, 1, 1)
+_STRING_CACHE_LIMIT = 1 << 16
+
+
+class DumpFormatError(ValueError):
+    pass
+
+
+class _StringTable:
+    """Appends strings to the data section; recently seen strings are reused."""
+
+    def __init__(self, index: IO[bytes], data: IO[bytes]) -> None:
+        self._index = index
+        self._data = data
+        self._ids: Dict[str, int] = {}
+        self._offset = 0
+        self.count = 0
+
+    def add(self, value: Optional[str]) -> int:
+        if value is None:
+            return _NO_STRING
+        string_id = self._ids.get(value)
+        if string_id is not None:
+            return string_id
+        if len(self._ids) >= _STRING_CACHE_LIMIT:
+            self._ids.clear()
+        encoded = value.encode("utf-8")
+        self._index.write(_OFFSET.pack(self._offset))
+        self._data.write(encoded)
+        self._offset += len(encoded)
+        string_id = self._ids[value] = self.count
+        self.count += 1
+        return string_id
+
+    def close(self) -> None:
+        self._index.write(_OFFSET.pack(self._offset))
+
+
+def iter_dump_chunks(
+    routes: Iterable[Route],
+    timetables: Iterable[Timetable],
+    meta: Optional[Dict[str, object]] = None,
+) -> Iterator[bytes]:
+    """Yields the dump of ``routes`` and ``timetables`` as a stream of byte chunks."""
+    files = {name: tempfile.TemporaryFile() for name in _SECTIONS}
+    try:
+        counts = dict.fromkeys(_SECTIONS, 0)
+        strings = _StringTable(files["str_index"], files["str_data"])
+        index: Dict[str, List[Tuple[bytes, int, int]]] = {"routes": [], "timetables": []}
+
+        for route in routes:
+            route_id = strings.add(route.id)
+            index["routes"].append((route.id.encode("utf-8"), route_id, counts["routes"]))
+            files["routes"].write(
+                _ROUTE.pack(
+                    route_id,
+                    strings.add(route.name),
+                    strings.add(route.description),
+                    strings.add(route.country),
+                    route.estimated_speed_kmh,
+                    counts["stations"],
+                    len(route.stations),
+                    counts["segments"],
+                    len(route.segments),
+                    strings.add(json.dumps(route.composed_of) if route.composed_of else None),
+                )
+            )
+            for station in route.stations:
+                files["stations"].write(
+                    _STATION.pack(
+                        strings.add(station.id),
+                        strings.add(station.name),
+                        station.kilometer,
+                        _NO_INT if station.elevation is None else station.elevation,
+                    )
+                )
+            for segment in route.segments:
+                files["segments"].write(
+                    _SEGMENT.pack(
+                        strings.add(segment.id),
+                        segment.km_start,
+                        segment.km_end,
+                        segment.speed_limit,
+                        _NO_INT if segment.gradient is None else segment.gradient,
+                        strings.add(segment.note),
+                    )
+                )
+            counts["routes"] += 1
+            counts["stations"] += len(route.stations)
+            counts["segments"] += len(route.segments)
+
+        for timetable in timetables:
+            timetable_id = strings.add(timetable.id)
+            index["timetables"].append((timetable.id.encode("utf-8"), timetable_id, counts["timetables"]))
+            files["timetables"].write(
+                _TIMETABLE.pack(
+                    timetable_id,
+                    strings.add(timetable.route_id),
+                    strings.add(timetable.train_number),
+                    strings.add(timetable.title),
+                    counts["entries"],
+                    len(timetable.entries),
+                    strings.add(timetable.category_id),
+                )
+            )
+            for entry in timetable.entries:
+                arrival, arrival_offset = _encode_time(entry.arrival)
+                departure, departure_offset = _encode_time(entry.departure)
+                files["entries"].write(
+                    _ENTRY.pack(
+                        strings.add(entry.station_id),
+                        strings.add(entry.station_name),
+                        arrival,
+                        departure,
+                        arrival_offset,
+                        departure_offset,
+                        strings.add(entry.track),
+                        strings.add(entry.remarks),
+                        entry.pass_through,
+                    )
+                )
+            counts["timetables"] += 1
+            counts["entries"] += len(timetable.entries)
+
+        strings.close()
+        counts["str_index"] = strings.count
+        for section, ids in index.items():
+            # Stable sort: among duplicate IDs the last record ends up last,
+            # which is the one a lookup returns.
+            ids.sort(key=lambda item: item[0])
+            name = _INDEXES[section]
+            files[name].writelines(_INDEX.pack(string_id, idx) for _, string_id, idx in ids)
+            counts[name] = len(ids)
+        files["meta"].write(json.dumps(meta or {}).encode("utf-8"))
+
+        header: List[int] = []
+        offset = _HEADER.size
+        for name in _SECTIONS:
+            size = files[name].tell()
+            header.extend((offset, counts[name] if name not in ("str_data", "meta") else size))
+            offset += size
+        yield _HEADER.pack(MAGIC, VERSION, 0, *header)
+
+        for name in _SECTIONS:
+            handle = files[name]
+            handle.seek(0)
+            while True:
+                chunk = handle.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        for handle in files.values():
+            handle.close()
+
+
+def write_dump(
+    path: str,
+    routes: Iterable[Route],
+    timetables: Iterable[Timetable],
+    meta: Optional[Dict[str, object]] = None,
+) -> None:
+    with open(path, "wb") as handle:
+        for chunk in iter_dump_chunks(routes, timetables, meta):
+            handle.write(chunk)
+
+
+def save_stream(stream: IO[bytes], path: str) -> None:
+    """Copies an incoming dump (e.g. a request body) to ``path`` chunk by chunk."""
+    with open(path, "wb") as handle:
+        shutil.copyfileobj(stream, handle, CHUNK_SIZE)
+
+
+class DumpReader:
+    """Read-only view of a dump file through ``mmap``.
+
+    Records are decoded on access, so opening a dump costs a header read and
+    the operating system pages in only what is actually looked up.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as exc:
+            self._file.close()
+            raise DumpFormatError("Dump file is empty") from exc
+        try:
+            self._read_header()
+        except DumpFormatError:
+            self.close()
+            raise
+
+    def _read_header(self) -> None:
+        if len(self._map) < _HEADER.size:
+            raise DumpFormatError("File is too short for a dump header")
+        magic, version, _, *layout = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise DumpFormatError("Not a timetable dump")
+        if version != VERSION:
+            raise DumpFormatError(f"Unsupported dump version: {version}")
+        self._sections = {name: (layout[2 * idx], layout[2 * idx + 1]) for idx, name in enumerate(_SECTIONS)}
+        self._check_layout()
+
+    def close(self) -> None:
+        if hasattr(self, "_map"):
+            self._map.close()
+        self._file.close()
+
+    def _check_layout(self) -> None:
+        """Rejects dumps whose sections or string index point past the file."""
+        for name, (offset, _) in self._sections.items():
+            end = offset + self._section_size(name)
+            if offset < _HEADER.size or end > len(self._map):
+                raise DumpFormatError(f"Section {name} lies outside the file (truncated dump?)")
+        string_count = self._sections["str_index"][1]
+        index_offset = self._sections["str_index"][0]
+        first = _OFFSET.unpack_from(self._map, index_offset)[0]
+        last = _OFFSET.unpack_from(self._map, index_offset + string_count * _OFFSET.size)[0]
+        if first != 0 or last != self._sections["str_data"][1]:
+            raise DumpFormatError("String index does not match the string data")
+
+    def _section_size(self, name: str) -> int:
+        count = self._sections[name][1]
+        if name in _RECORDS:
+            return count * _RECORDS[name].size
+        if name in _INDEXES.values():
+            return count * _INDEX.size
+        if name == "str_index":
+            return (count + 1) * _OFFSET.size
+        return count
+
+    def __enter__(self) -> "DumpReader":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @property
+    def route_count(self) -> int:
+        return self._sections["routes"][1]
+
+    @property
+    def timetable_count(self) -> int:
+        return self._sections["timetables"][1]
+
+    @property
+    def meta(self) -> Dict[str, object]:
+        offset, size = self._sections["meta"]
+        try:
+            meta = json.loads(bytes(self._map[offset : offset + size]).decode("utf-8") or "{}")
+        except ValueError as exc:
+            raise DumpFormatError("Dump metadata is not valid JSON") from exc
+        if not isinstance(meta, dict):
+            raise DumpFormatError("Dump metadata is not an object")
+        return meta
+
+    def iter_routes(self) -> Iterator[Route]:
+        for idx in range(self.route_count):
+            yield self._route_at(idx)
+
+    def iter_timetables(self) -> Iterator[Timetable]:
+        for idx in range(self.timetable_count):
+            yield self._timetable_at(idx)
+
+    def get_route(self, route_id: str) -> Optional[Route]:
+        idx = self._find("routes", route_id)
+        return None if idx is None else self._route_at(idx)
+
+    def get_timetable(self, timetable_id: str) -> Optional[Timetable]:
+        idx = self._find("timetables", timetable_id)
+        return None if idx is None else self._timetable_at(idx)
+
+    def _find(self, section: str, record_id: str) -> Optional[int]:
+        """Record index of ``record_id`` in ``section``; the last one wins for duplicates."""
+        index = _INDEXES[section]
+        offset, count = self._sections[index]
+        keys = _IndexKeys(self, offset, count)
+        key = record_id.encode("utf-8")
+        pos = bisect_right(keys, key)
+        if pos == 0 or keys[pos - 1] != key:
+            return None
+        idx = _INDEX.unpack_from(self._map, offset + (pos - 1) * _INDEX.size)[1]
+        if idx >= self._sections[section][1]:
+            raise DumpFormatError(f"Index {index} points past section {section}")
+        return idx
+
+    def _route_at(self, idx: int) -> Route:
+        try:
+            return self._decode_route(idx)
+        except (struct.error, UnicodeDecodeError) as exc:
+            raise DumpFormatError(f"Route record {idx} is corrupt") from exc
+
+    def _timetable_at(self, idx: int) -> Timetable:
+        try:
+            return self._decode_timetable(idx)
+        except (struct.error, UnicodeDecodeError) as exc:
+            raise DumpFormatError(f"Timetable record {idx} is corrupt") from exc
+
+    def _decode_route(self, idx: int) -> Route:
+        (
+            route_id,
+            name,
+            description,
+            country,
+            speed,
+            station_start,
+            station_count,
+            segment_start,
+            segment_count,
+            composed_of,
+        ) = self._record_at("routes", idx)
+        stations = [
+            Station(
+                id=self._string(station_id),
+                name=self._string(station_name),
+                kilometer=kilometer,
+                elevation=None if elevation == _NO_INT else elevation,
+            )
+            for station_id, station_name, kilometer, elevation in self._records(
+                "stations", station_start, station_count
+            )
+        ]
+        segments = [
+            TrackSegment(
+                id=self._string(segment_id),
+                km_start=km_start,
+                km_end=km_end,
+                speed_limit=speed_limit,
+                gradient=None if gradient == _NO_INT else gradient,
+                note=self._optional_string(note),
+            )
+            for segment_id, km_start, km_end, speed_limit, gradient, note in self._records(
+                "segments", segment_start, segment_count
+            )
+        ]
+        return Route(
+            id=self._string(route_id),
+            name=self._string(name),
+            description=self._string(description),
+            country=self._string(country),
+            estimated_speed_kmh=speed,
+            stations=stations,
+            segments=segments,
+            composed_of=self._composed_of(composed_of),
+        )
+
+    def _decode_timetable(self, idx: int) -> Timetable:
+        timetable_id, route_id, train_number, title, entry_start, entry_count, category = self._record_at(
+            "timetables", idx
+        )
+        entries = [
+            TimetableEntry(
+                station_id=self._string(station_id),
+                station_name=self._string(station_name),
+                arrival=_decode_time(arrival, arrival_offset),
+                departure=_decode_time(departure, departure_offset),
+                track=self._optional_string(track),
+                remarks=self._optional_string(remarks),
+                pass_through=bool(pass_through),
+            )
+            for (
+                station_id,
+                station_name,
+                arrival,
+                departure,
+                arrival_offset,
+                departure_offset,
+                track,
+                remarks,
+                pass_through,
+            ) in self._records("entries", entry_start, entry_count)
+        ]
+        return Timetable(
+            id=self._string(timetable_id),
+            route_id=self._string(route_id),
+            train_number=self._string(train_number),
+            title=self._string(title),
+            entries=entries,
+            category_id=self._optional_string(category),
+        )
+
+    def _composed_of(self, string_id: int) -> List[str]:
+        if string_id == _NO_STRING:
+            return []
+        try:
+            route_ids = json.loads(self._string(string_id))
+        except ValueError as exc:
+            raise DumpFormatError("composed_of is not valid JSON") from exc
+        if not isinstance(route_ids, list) or not all(isinstance(route_id, str) for route_id in route_ids):
+            raise DumpFormatError("composed_of is not a list of route IDs")
+        return route_ids
+
+    def _record_at(self, section: str, idx: int) -> Tuple:
+        record = _RECORDS[section]
+        return record.unpack_from(self._map, self._sections[section][0] + idx * record.size)
+
+    def _records(self, section: str, start: int, count: int) -> Iterator[Tuple]:
+        if start + count > self._sections[section][1]:
+            raise DumpFormatError(f"Record run {start}+{count} exceeds section {section}")
+        record = _RECORDS[section]
+        offset = self._sections[section][0] + start * record.size
+        return record.iter_unpack(self._map[offset : offset + count * record.size])
+
+    def _string(self, string_id: int) -> str:
+        return self._string_bytes(string_id).decode("utf-8")
+
+    def _string_bytes(self, string_id: int) -> bytes:
+        if string_id >= self._sections["str_index"][1]:
+            raise DumpFormatError(f"String {string_id} is not in the string table")
+        index_offset = self._sections["str_index"][0] + string_id * _OFFSET.size
+        start, end = struct.unpack_from("<QQ", self._map, index_offset)
+        data_offset, data_size = self._sections["str_data"]
+        if not start <= end <= data_size:
+            raise DumpFormatError(f"String {string_id} points outside the string data")
+        return self._map[data_offset + start : data_offset + end]
+
+    def _optional_string(self, string_id: int) -> Optional[str]:
+        return None if string_id == _NO_STRING else self._string(string_id)
+
+
+class _IndexKeys:
+    """Sequence view of an index section's keys, for ``bisect`` on the mapped file."""
+
+    def __init__(self, reader: DumpReader, offset: int, count: int) -> None:
+        self._reader = reader
+        self._offset = offset
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, pos: int) -> bytes:
+        string_id = _INDEX.unpack_from(self._reader._map, self._offset + pos * _INDEX.size)[0]
+        return self._reader._string_bytes(string_id)
+
+
+def _encode_time(value: Optional[datetime]) -> Tuple[int, int]:
+    if value is None:
+        return _NO_TIME, _NAIVE
+    offset = value.utcoffset()
+    if offset is None:
+        return (value - _EPOCH) // timedelta(microseconds=1), _NAIVE
+    utc = value.replace(tzinfo=None) - offset
+    return (utc - _EPOCH) // timedelta(microseconds=1), int(offset.total_seconds() // 60)
+
+
+def _decode_time(value: int, offset_minutes: int) -> Optional[datetime]:
+    if value == _NO_TIME:
+        return None
+    naive = _EPOCH + timedelta(microseconds=value)
+    if offset_minutes == _NAIVE:
+        return naive
+    offset = timedelta(minutes=offset_minutes)
+    return (naive + offset).replace(tzinfo=timezone(offset))
@@ -0,0 +1,119 @@
+"""Response compression, ETags and cache headers for static assets."""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from flask import Flask, Response, current_app, request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional, gzip is always there
+    brotli = None
+
+from .compact import COMPACT_MIMETYPE
+
+COMPRESSIBLE_MIMETYPES = {"application/json", COMPACT_MIMETYPE, "application/pdf", "image/svg+xml"}
+STATIC_MAX_AGE = 365 * 24 * 3600
+
+_asset_hashes: Dict[str, Tuple[float, str]] = {}
+
+
+def init_app(app: Flask) -> None:
+    app.config.setdefault("COMPRESS_MIN_SIZE", 1024)
+    app.config.setdefault("COMPRESS_GZIP_LEVEL", 6)
+    app.config.setdefault("COMPRESS_BROTLI_QUALITY", 5)
+    app.url_defaults(_hashed_static_url)
+    app.after_request(_finalize_response)
+
+
+def send_static_asset(filename: str) -> Response:
+    """Serves a static file; URLs carrying the current content hash are cached for good."""
+    response = send_from_directory(current_app.static_folder, filename)
+    version = request.args.get("v")
+    if version and version == asset_hash(filename):
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+        response.cache_control.immutable = True
+        response.cache_control.no_cache = None
+    return response
+
+
+def asset_hash(filename: str) -> Optional[str]:
+    path = os.path.join(current_app.static_folder, filename)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    cached = _asset_hashes.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, "rb") as handle:
+        digest = hashlib.sha256(handle.read()).hexdigest()[:12]
+    _asset_hashes[path] = (mtime, digest)
+    return digest
+
+
+def _hashed_static_url(endpoint: str, values: Dict[str, Any]) -> None:
+    if endpoint == "static" and "filename" in values and "v" not in values:
+        digest = asset_hash(values["filename"])
+        if digest:
+            values["v"] = digest
+
+
+def _finalize_response(response: Response) -> Response:
+    if request.method in ("GET", "HEAD") and request.path.startswith("/api/"):
+        _add_etag(response)
+    _compress(response)
+    return response
+
+
+def _add_etag(response: Response) -> None:
+    if response.status_code != 200 or (response.is_streamed and not response.direct_passthrough):
+        return
+    response.direct_passthrough = False
+    response.add_etag()
+    response.make_conditional(request)
+
+
+def _compress(response: Response) -> None:
+    if response.status_code != 200 or (response.is_streamed and not response.direct_passthrough):
+        return
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES or "Content-Encoding" in response.headers:
+        return
+    response.vary.add("Accept-Encoding")
+    encoding = _pick_encoding()
+    if encoding is None:
+        return
+
+    response.direct_passthrough = False
+    data = response.get_data()
+    if len(data) < current_app.config["COMPRESS_MIN_SIZE"]:
+        return
+    started = time.perf_counter()
+    if encoding == "br":
+        compressed = brotli.compress(data, quality=current_app.config["COMPRESS_BROTLI_QUALITY"])
+    else:
+        compressed = gzip.compress(data, compresslevel=current_app.config["COMPRESS_GZIP_LEVEL"], mtime=0)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    response.headers.add("Server-Timing", f"compress;dur={elapsed_ms:.2f}")
+    # The entity changed; keep the tag but make it weak so If-None-Match
+    # still matches across encodings.
+    etag, _ = response.get_etag()
+    if etag:
+        response.set_etag(etag, weak=True)
+
+
+def _pick_encoding() -> Optional[str]:
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
@@ -2,16 +2,66 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import List, Optional
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
 import itertools
 
+# Minutes lost per stop for braking and accelerating, by acceleration class.
+ACCELERATION_LOSS_MINUTES: Dict[str, float] = {
+    "high": 0.5,
+    "medium": 1.0,
+    "low": 2.0,
+}
+# Longest stop a timetable may plan; generation and validation share it.
+MAX_DWELL_MINUTES = 30.0
+
+
+# Object IDs ("tt-1") and train numbers per category ("RJ 540") are counted
+# separately, so a category ID can never advance an ID prefix.
+_id_counters: Dict[str, Iterator[int]] = {}
+_train_numbers: Dict[str, Iterator[int]] = {}
+
+
+def _next_number(counters: Dict[str, Iterator[int]], key: str, start: int = 1) -> int:
+    return next(counters.setdefault(key, itertools.count(start)))
+
 
 def _generate_id(prefix: str) -> str:
-    counter = next(_generate_id._counters.setdefault(prefix, itertools.count(1)))
-    return f"{prefix}-{counter}"
+    return f"{prefix}-{_next_number(_id_counters, prefix)}"
+
+
+def _counter_state(counters: Dict[str, Iterator[int]]) -> Dict[str, int]:
+    state: Dict[str, int] = {}
+    for key, counter in counters.items():
+        state[key] = next(counter)
+        counters[key] = itertools.count(state[key])
+    return state
+
+
+def _restore_counters(counters: Dict[str, Iterator[int]], state: Dict[str, int]) -> None:
+    current = _counter_state(counters)
+    for key, value in state.items():
+        counters[key] = itertools.count(max(value, current.get(key, 1)))
+
+
+def id_counter_state() -> Dict[str, int]:
+    """Returns the next number per ID prefix without advancing the counters."""
+    return _counter_state(_id_counters)
 
 
-_generate_id._counters = {}  # type: ignore[attr-defined]
+def restore_id_counters(state: Dict[str, int]) -> None:
+    """Moves the counters forward to ``state``; counters already past it are kept."""
+    _restore_counters(_id_counters, state)
+
+
+def counter_state() -> Dict[str, Dict[str, int]]:
+    """ID and train-number counters, as kept in snapshots and dump metadata."""
+    return {"id_counters": id_counter_state(), "train_numbers": _counter_state(_train_numbers)}
+
+
+def restore_counter_state(state: Dict[str, Dict[str, int]]) -> None:
+    restore_id_counters(state.get("id_counters", {}))
+    _restore_counters(_train_numbers, state.get("train_numbers", {}))
 
 
 @dataclass
@@ -31,6 +81,7 @@ class Route:
     estimated_speed_kmh: int
     stations: List[Station] = field(default_factory=list)
     segments: List["TrackSegment"] = field(default_factory=list)
+    composed_of: List[str] = field(default_factory=list)
 
 
 @dataclass
@@ -41,6 +92,7 @@ class TimetableEntry:
     departure: Optional[datetime]
     track: Optional[str] = None
     remarks: Optional[str] = None
+    pass_through: bool = False
 
 
 @dataclass
@@ -50,41 +102,179 @@ class Timetable:
     train_number: str
     title: str
     entries: List[TimetableEntry] = field(default_factory=list)
+    category_id: Optional[str] = None
 
     @property
     def route_name(self) -> str:
         return self.title
 
 
-def generate_base_timetable(route: Route, start_time: datetime, dwell_minutes: int = 2) -> Timetable:
+# Per-station stop rules: station ID -> dwell in minutes, or None for passing through.
+StopRules = Tuple[Tuple[str, Optional[float]], ...]
+
+
+@dataclass(frozen=True)
+class Vehicle:
+    """Rolling stock: its own top speed and acceleration class."""
+
+    id: str
+    name: str
+    max_speed_kmh: int
+    acceleration: str
+
+
+@dataclass(frozen=True)
+class TrainCategory:
+    """Train type run with a given vehicle.
+
+    ``max_speed_kmh`` is the category's own limit; the train never runs
+    faster than ``vmax_kmh``, the lower of that and the vehicle's top speed.
+    Stations without a stop rule get ``default_dwell_minutes`` when
+    ``stops_by_default`` is set and are passed otherwise; with
+    ``min_stop_spacing_km`` a station closer than that to the previous stop
+    is passed as well, which gives express categories their stopping
+    pattern on any route. The first and the last station of a run are
+    always stops.
+    """
+
+    id: str
+    name: str
+    vehicle: Vehicle
+    max_speed_kmh: int
+    default_dwell_minutes: float
+    number_base: int
+    stops_by_default: bool = True
+    min_stop_spacing_km: float = 0.0
+
+    @property
+    def vmax_kmh(self) -> int:
+        return min(self.max_speed_kmh, self.vehicle.max_speed_kmh)
+
+    @property
+    def acceleration(self) -> str:
+        return self.vehicle.acceleration
+
+
+@dataclass(frozen=True)
+class StopPlan:
+    """Per-station stop flags and dwells plus per-leg running minutes."""
+
+    stops: Tuple[bool, ...]
+    dwell_minutes: Tuple[float, ...]
+    run_minutes: Tuple[float, ...]
+
+
+def build_stop_plan(
+    route: Route,
+    category: Optional[TrainCategory] = None,
+    dwell_minutes: Optional[float] = None,
+    stop_rules: StopRules = (),
+) -> StopPlan:
+    stations = tuple((station.id, station.kilometer) for station in route.stations)
+    segments = tuple((segment.km_start, segment.km_end, segment.speed_limit) for segment in route.segments)
+    return _stop_plan(stations, segments, route.estimated_speed_kmh, category, dwell_minutes, stop_rules)
+
+
+@lru_cache(maxsize=256)
+def _stop_plan(
+    stations: Tuple[Tuple[str, float], ...],
+    segments: Tuple[Tuple[float, float, int], ...],
+    estimated_speed_kmh: int,
+    category: Optional[TrainCategory],
+    dwell_minutes: Optional[float],
+    stop_rules: StopRules,
+) -> StopPlan:
+    last = len(stations) - 1
+    rules = dict(stop_rules)
+    if category is None:
+        default_dwell: Optional[float] = 2.0 if dwell_minutes is None else float(dwell_minutes)
+    elif category.stops_by_default:
+        default_dwell = category.default_dwell_minutes if dwell_minutes is None else float(dwell_minutes)
+    else:
+        default_dwell = None
+    spacing = category.min_stop_spacing_km if category else 0.0
+    stop_list: List[bool] = []
+    dwell_list: List[float] = []
+    previous_stop_km = stations[0][1] if stations else 0.0
+    for idx, (station_id, kilometer) in enumerate(stations):
+        if idx in (0, last):
+            stop_list.append(True)
+            dwell_list.append(0.0)
+            continue
+        if station_id in rules:
+            rule = rules[station_id]
+        elif abs(kilometer - previous_stop_km) < spacing:
+            rule = None
+        else:
+            rule = default_dwell
+        if rule is not None:
+            previous_stop_km = kilometer
+        stop_list.append(rule is not None)
+        dwell_list.append(rule or 0.0)
+
+    if category is None:
+        runs = tuple(
+            max(stations[idx + 1][1] - stations[idx][1], 0.1) / estimated_speed_kmh * 60 for idx in range(last)
+        )
+        return StopPlan(tuple(stop_list), tuple(dwell_list), runs)
+
+    vmax_kmh = category.vmax_kmh
+    cruise_kmh = min(vmax_kmh, estimated_speed_kmh)
+    stop_loss = ACCELERATION_LOSS_MINUTES[category.acceleration] / 2
+    runs: List[float] = []
+    for idx in range(last):
+        low, high = sorted((stations[idx][1], stations[idx + 1][1]))
+        minutes = 0.0
+        covered = 0.0
+        for km_start, km_end, speed_limit in segments:
+            overlap = min(high, max(km_start, km_end)) - max(low, min(km_start, km_end))
+            if overlap > 0:
+                minutes += overlap / min(vmax_kmh, speed_limit) * 60
+                covered += overlap
+        minutes += max(max(high - low, 0.1) - covered, 0.0) / cruise_kmh * 60
+        minutes += stop_loss * (stop_list[idx] + stop_list[idx + 1])
+        runs.append(minutes)
+    return StopPlan(tuple(stop_list), tuple(dwell_list), tuple(runs))
+
+
+def generate_base_timetable(
+    route: Route,
+    start_time: datetime,
+    dwell_minutes: Optional[float] = 2,
+    category: Optional[TrainCategory] = None,
+    stop_rules: StopRules = (),
+) -> Timetable:
+    plan = build_stop_plan(route, category, dwell_minutes, stop_rules)
+    if category is None:
+        train_number = f"{route.id.upper()}-001"
+        title = f"{route.name} – Grundfahrplan"
+    else:
+        train_number = f"{category.id} {_next_number(_train_numbers, category.id, category.number_base)}"
+        title = f"{route.name} – {category.name}"
     timetable = Timetable(
         id=_generate_id("tt"),
         route_id=route.id,
-        train_number=f"{route.id.upper()}-001",
-        title=f"{route.name} – Grundfahrplan",
+        train_number=train_number,
+        title=title,
+        category_id=category.id if category else None,
     )
 
     current_time = start_time
-    previous_km: Optional[float] = None
-
-    for station in route.stations:
-        arrival = current_time if previous_km is not None else None
-        if previous_km is not None:
-            distance_km = max(station.kilometer - previous_km, 0.1)
-            travel_minutes = distance_km / route.estimated_speed_kmh * 60
-            arrival = current_time + timedelta(minutes=travel_minutes)
-            current_time = arrival
-        departure = arrival + timedelta(minutes=dwell_minutes) if arrival else start_time
-        entry = TimetableEntry(
-            station_id=station.id,
-            station_name=station.name,
-            arrival=arrival,
-            departure=departure if station != route.stations[-1] else None,
+    last = len(route.stations) - 1
+    for idx, station in enumerate(route.stations):
+        if idx:
+            current_time += timedelta(minutes=plan.run_minutes[idx - 1])
+        arrival = current_time if idx and plan.stops[idx] else None
+        current_time += timedelta(minutes=plan.dwell_minutes[idx])
+        timetable.entries.append(
+            TimetableEntry(
+                station_id=station.id,
+                station_name=station.name,
+                arrival=arrival,
+                departure=current_time if idx < last else None,
+                pass_through=not plan.stops[idx],
+            )
         )
-        timetable.entries.append(entry)
-        previous_km = station.kilometer
-        if departure:
-            current_time = departure
 
     return timetable
 
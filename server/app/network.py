@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import Route, Station, TrackSegment
+
+# A route slice: (route ID, index of the first station, index of the last station).
+# A first index above the last one means the route is run in reverse.
+Leg = Tuple[str, int, int]
+
+_CHANGE_PENALTY_KM = 1.0
+
+_StationKey = Tuple[Tuple[str, str, float], ...]
+_SegmentKey = Tuple[Tuple[str, float, float, int, Optional[int], Optional[str]], ...]
+
+
+def station_key(name: str) -> str:
+    """Stations of different routes are the same node when their names match."""
+    return " ".join(name.casefold().split())
+
+
+@dataclass
+class RouteNetwork:
+    routes: Dict[str, Route]
+    # node -> [(neighbour node, km, route ID, from index, to index)]
+    edges: Dict[str, List[Tuple[str, float, str, int, int]]]
+    # station ID or name key -> node
+    nodes: Dict[str, str]
+
+    def find_path(self, origin: str, destination: str) -> Optional[List[Leg]]:
+        """Shortest path (by km) between two stations given by ID or name.
+
+        Changing routes costs a small penalty so that a through route is
+        preferred over hopping between parallel ones.
+        """
+        start = self._node(origin)
+        goal = self._node(destination)
+        if start is None or goal is None or start == goal:
+            return None
+
+        queue: List[Tuple[float, int, str, Optional[str]]] = [(0.0, 0, start, None)]
+        best: Dict[Tuple[str, Optional[str]], float] = {(start, None): 0.0}
+        previous: Dict[Tuple[str, Optional[str]], Tuple[Tuple[str, Optional[str]], int, int]] = {}
+        counter = 0
+        while queue:
+            distance, _, node, via = heapq.heappop(queue)
+            if node == goal:
+                return _legs(previous, (node, via))
+            if distance > best.get((node, via), float("inf")):
+                continue
+            for neighbour, km, route_id, from_idx, to_idx in self.edges.get(node, []):
+                cost = distance + km + (0.0 if via in (None, route_id) else _CHANGE_PENALTY_KM)
+                state = (neighbour, route_id)
+                if cost < best.get(state, float("inf")):
+                    best[state] = cost
+                    previous[state] = ((node, via), from_idx, to_idx)
+                    counter += 1
+                    heapq.heappush(queue, (cost, counter, neighbour, route_id))
+        return None
+
+    def compose(self, legs: List[Leg]) -> Route:
+        parts = tuple(
+            (
+                route_id,
+                start,
+                end,
+                _station_fingerprint(self.routes[route_id]),
+                _segment_fingerprint(self.routes[route_id]),
+            )
+            for route_id, start, end in legs
+        )
+        names = tuple(self.routes[route_id].name for route_id, _, _ in legs)
+        speeds = tuple(self.routes[route_id].estimated_speed_kmh for route_id, _, _ in legs)
+        country = self.routes[legs[0][0]].country
+        return _compose(parts, names, speeds, country)
+
+    def _node(self, station: str) -> Optional[str]:
+        return self.nodes.get(station) or self.nodes.get(station_key(station))
+
+
+def build_network(routes: Iterable[Route]) -> RouteNetwork:
+    """Connects plain (not composed) routes through stations with equal names."""
+    network = RouteNetwork(routes={}, edges={}, nodes={})
+    for route in routes:
+        if route.composed_of:
+            continue
+        network.routes[route.id] = route
+        keys = [station_key(station.name) for station in route.stations]
+        for station, key in zip(route.stations, keys):
+            network.nodes.setdefault(station.id, key)
+            network.nodes.setdefault(key, key)
+        for idx in range(len(route.stations) - 1):
+            km = abs(route.stations[idx + 1].kilometer - route.stations[idx].kilometer)
+            network.edges.setdefault(keys[idx], []).append((keys[idx + 1], km, route.id, idx, idx + 1))
+            network.edges.setdefault(keys[idx + 1], []).append((keys[idx], km, route.id, idx + 1, idx))
+    return network
+
+
+def _legs(
+    previous: Dict[Tuple[str, Optional[str]], Tuple[Tuple[str, Optional[str]], int, int]],
+    state: Tuple[str, Optional[str]],
+) -> List[Leg]:
+    hops: List[Tuple[str, int, int]] = []
+    while state in previous:
+        parent, from_idx, to_idx = previous[state]
+        hops.append((state[1], from_idx, to_idx))  # type: ignore[arg-type]
+        state = parent
+    hops.reverse()
+
+    legs: List[Leg] = []
+    for route_id, from_idx, to_idx in hops:
+        if legs and legs[-1][0] == route_id:
+            legs[-1] = (route_id, legs[-1][1], to_idx)
+        else:
+            legs.append((route_id, from_idx, to_idx))
+    return legs
+
+
+def _station_fingerprint(route: Route) -> _StationKey:
+    return tuple((station.id, station.name, station.kilometer) for station in route.stations)
+
+
+def _segment_fingerprint(route: Route) -> _SegmentKey:
+    return tuple(
+        (segment.id, segment.km_start, segment.km_end, segment.speed_limit, segment.gradient, segment.note)
+        for segment in route.segments
+    )
+
+
+@lru_cache(maxsize=128)
+def _compose(
+    parts: Tuple[Tuple[str, int, int, _StationKey, _SegmentKey], ...],
+    names: Tuple[str, ...],
+    speeds: Tuple[int, ...],
+    country: str,
+) -> Route:
+    """Concatenates route slices onto one km axis starting at 0.
+
+    Memoised per route path (including the routes' stations and segments),
+    so repeated through-train generation reuses the same merged lists.
+    """
+    stations: List[Station] = []
+    segments: List[TrackSegment] = []
+    offset = 0.0
+    weighted_speed = 0.0
+    for (route_id, start, end, route_stations, route_segments), speed in zip(parts, speeds):
+        step = 1 if end >= start else -1
+        origin_km = route_stations[start][2]
+        direction = 1.0 if route_stations[end][2] >= origin_km else -1.0
+        for idx in range(start, end + step, step):
+            station_id, name, kilometer = route_stations[idx]
+            if stations and idx == start:
+                continue  # junction station, already added by the previous leg
+            merged_km = round(offset + (kilometer - origin_km) * direction, 3)
+            stations.append(Station(id=station_id, name=name, kilometer=merged_km))
+
+        low, high = sorted((origin_km, route_stations[end][2]))
+        for segment_id, km_start, km_end, speed_limit, gradient, note in route_segments:
+            seg_low, seg_high = sorted((km_start, km_end))
+            clipped_low, clipped_high = max(seg_low, low), min(seg_high, high)
+            if clipped_high <= clipped_low:
+                continue
+            mapped = sorted(offset + (km - origin_km) * direction for km in (clipped_low, clipped_high))
+            segments.append(
+                TrackSegment(
+                    id=segment_id,
+                    km_start=round(mapped[0], 3),
+                    km_end=round(mapped[1], 3),
+                    speed_limit=speed_limit,
+                    gradient=gradient if gradient is None or direction > 0 else -gradient,
+                    note=note,
+                )
+            )
+        length = high - low
+        offset += length
+        weighted_speed += speed * length
+
+    segments.sort(key=lambda segment: segment.km_start)
+    first, last = stations[0], stations[-1]
+    return Route(
+        id=f"{first.id}>{last.id}",
+        name=f"{first.name} – {last.name}",
+        description="Durchgehend über " + ", ".join(names),
+        country=country,
+        estimated_speed_kmh=round(weighted_speed / offset) if offset else speeds[0],
+        stations=stations,
+        segments=segments,
+        composed_of=[route_id for route_id, *_ in parts],
+    )
@@ -1,8 +1,7 @@
 from __future__ import annotations
 
 import io
-import math
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Optional, Sequence, Tuple
 
 from reportlab.lib import colors
@@ -10,12 +9,183 @@ from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.units import mm
 from reportlab.pdfgen import canvas
 
+from .categories import get_category
+from .diagram import (
+    collect_run_points,
+    duration_text,
+    format_gradient,
+    km_bounds,
+    km_to_y,
+    speed_color,
+    time_bounds,
+    time_ticks,
+    time_to_x,
+    total_minutes,
+)
 from .models import Route, Station, Timetable, TrackSegment
 
+PDF_COMPRESSION_MODES: Dict[str, int] = {
+    "none": 0,
+    "flate": 1,
+}
+DEFAULT_PDF_COMPRESSION = "flate"
+
+_StrokeStyle = Tuple[colors.Color, float, Tuple[float, ...]]
+_FillStyle = Tuple[Optional[colors.Color], float, colors.Color, float]
+_TextStyle = Tuple[str, float, colors.Color, str]
+
+
+class _Pen:
+    """Canvas front-end used by the diagram layers.
+
+    Drops graphics-state changes that would not alter the current state and,
+    when ``batched`` is set, collects lines, circles and labels of the same
+    style so that ``flush`` can emit one path (or one text block) per style
+    instead of one per primitive. With ``batched=False`` every call is passed
+    straight to the canvas, which is how the diagram used to be drawn.
+    """
+
+    def __init__(self, pdf: canvas.Canvas, batched: bool = True) -> None:
+        self.pdf = pdf
+        self.batched = batched
+        self._state: Dict[str, object] = {}
+        self._lines: Dict[_StrokeStyle, List[Tuple[float, float, float, float]]] = {}
+        self._circles: Dict[_FillStyle, List[Tuple[float, float]]] = {}
+        self._labels: Dict[_TextStyle, List[Tuple[float, float, str]]] = {}
+
+    def _changed(self, key: str, value: object) -> bool:
+        if self.batched and key in self._state and self._state[key] == value:
+            return False
+        self._state[key] = value
+        return True
+
+    def stroke_color(self, color: colors.Color) -> None:
+        if self._changed("stroke", color):
+            self.pdf.setStrokeColor(color)
+
+    def fill_color(self, color: colors.Color) -> None:
+        if self._changed("fill", color):
+            self.pdf.setFillColor(color)
+
+    def line_width(self, width: float) -> None:
+        if self._changed("width", width):
+            self.pdf.setLineWidth(width)
+
+    def dash(self, pattern: Tuple[float, ...]) -> None:
+        if self._changed("dash", pattern):
+            self.pdf.setDash(list(pattern))
+
+    def font(self, name: str, size: float) -> None:
+        if self._changed("font", (name, size)):
+            self.pdf.setFont(name, size)
+
+    def line(
+        self,
+        x1: float,
+        y1: float,
+        x2: float,
+        y2: float,
+        color: colors.Color,
+        width: float,
+        dash: Tuple[float, ...] = (),
+    ) -> None:
+        if self.batched:
+            self._lines.setdefault((color, width, dash), []).append((x1, y1, x2, y2))
+            return
+        self.stroke_color(color)
+        self.line_width(width)
+        self.dash(dash)
+        self.pdf.line(x1, y1, x2, y2)
+
+    def circle(
+        self,
+        x: float,
+        y: float,
+        radius: float,
+        fill: colors.Color,
+        stroke: Optional[colors.Color] = None,
+        width: float = 1.0,
+    ) -> None:
+        if self.batched:
+            self._circles.setdefault((stroke, width, fill, radius), []).append((x, y))
+            return
+        self.fill_color(fill)
+        if stroke is not None:
+            self.stroke_color(stroke)
+            self.line_width(width)
+        self.pdf.circle(x, y, radius, stroke=1 if stroke is not None else 0, fill=1)
+
+    def label(
+        self,
+        x: float,
+        y: float,
+        text: str,
+        font: str,
+        size: float,
+        color: colors.Color,
+        align: str = "centre",
+    ) -> None:
+        if self.batched:
+            self._labels.setdefault((font, size, color, align), []).append((x, y, text))
+            return
+        self.font(font, size)
+        self.fill_color(color)
+        if align == "right":
+            self.pdf.drawRightString(x, y, text)
+        else:
+            self.pdf.drawCentredString(x, y, text)
+
+    def flush(self) -> None:
+        """Emit everything collected since the last flush, one block per style."""
+        for (color, width, dash), lines in self._lines.items():
+            self.stroke_color(color)
+            self.line_width(width)
+            self.dash(dash)
+            path = self.pdf.beginPath()
+            for x1, y1, x2, y2 in lines:
+                path.moveTo(x1, y1)
+                path.lineTo(x2, y2)
+            self.pdf.drawPath(path, stroke=1, fill=0)
+        self._lines.clear()
+
+        for (stroke, width, fill, radius), centres in self._circles.items():
+            self.fill_color(fill)
+            if stroke is not None:
+                self.stroke_color(stroke)
+                self.line_width(width)
+            path = self.pdf.beginPath()
+            for x, y in centres:
+                path.circle(x, y, radius)
+            self.pdf.drawPath(path, stroke=1 if stroke is not None else 0, fill=1)
+        self._circles.clear()
+
+        for (font, size, color, align), labels in self._labels.items():
+            self.fill_color(color)
+            shift = 1.0 if align == "right" else 0.5
+            text = self.pdf.beginText()
+            text.setFont(font, size)
+            for x, y, label in labels:
+                text.setTextOrigin(x - shift * self.pdf.stringWidth(label, font, size), y)
+                text.textOut(label)
+            self.pdf.drawText(text)
+        self._labels.clear()
+
+
+def build_timetable_pdf(
+    timetable: Timetable,
+    route: Route,
+    compression: str = DEFAULT_PDF_COMPRESSION,
+    batched: bool = True,
+) -> bytes:
+    if compression not in PDF_COMPRESSION_MODES:
+        raise ValueError(f"Unknown PDF compression mode: {compression}")
 
-def build_timetable_pdf(timetable: Timetable, route: Route) -> bytes:
     buffer = io.BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=landscape(A4))
+    pdf = canvas.Canvas(
+        buffer,
+        pagesize=landscape(A4),
+        pageCompression=PDF_COMPRESSION_MODES[compression],
+    )
     width, height = landscape(A4)
 
     margin = 15 * mm
@@ -32,8 +202,8 @@ def build_timetable_pdf(timetable: Timetable, route: Route) -> bytes:
     label_right = graph_left - 8
 
     station_index = {station.id: station for station in route.stations}
-    start_time, end_time = _time_bounds(timetable)
-    min_km, max_km = _km_bounds(route)
+    start_time, end_time = time_bounds(timetable)
+    min_km, max_km = km_bounds(route)
 
     _draw_header(pdf, margin, height - margin + 6, timetable, route, start_time, end_time)
     _draw_sidebar(
@@ -61,6 +231,7 @@ def build_timetable_pdf(timetable: Timetable, route: Route) -> bytes:
         min_km,
         max_km,
         label_right,
+        batched,
     )
     _draw_speed_profile(
         pdf,
@@ -84,6 +255,7 @@ def build_timetable_pdf(timetable: Timetable, route: Route) -> bytes:
         end_time,
         min_km,
         max_km,
+        batched,
     )
 
     pdf.showPage()
@@ -108,6 +280,9 @@ def _draw_header(
     pdf.setFillColor(colors.black)
     pdf.drawString(x, y - 16, f"Zugnummer: {timetable.train_number}")
     pdf.drawString(x + 220, y - 16, f"Strecke: {route.name}")
+    category = get_category(timetable.category_id)
+    if category:
+        pdf.drawString(x + 520, y - 16, f"Gattung: {category.name} (Vmax {category.vmax_kmh} km/h)")
     pdf.drawString(x, y - 28, f"Zeitraum: {start_time.strftime('%H:%M')} – {end_time.strftime('%H:%M')} Uhr")
 
 
@@ -138,7 +313,7 @@ def _draw_sidebar(
     cursor_y -= 12
     pdf.drawString(x + 6, cursor_y, f"Kilometer: {min_km:.1f} – {max_km:.1f}")
     cursor_y -= 12
-    pdf.drawString(x + 6, cursor_y, f"Laufzeit: {_duration_text(start_time, end_time)}")
+    pdf.drawString(x + 6, cursor_y, f"Laufzeit: {duration_text(start_time, end_time)}")
 
     cursor_y -= 18
     pdf.setFont("Helvetica-Bold", 10)
@@ -156,7 +331,7 @@ def _draw_sidebar(
             f"{segment.km_start:.1f} – {segment.km_end:.1f} km | V{segment.speed_limit}",
         )
         cursor_y -= 10
-        gradient_text = _format_gradient(segment.gradient)
+        gradient_text = format_gradient(segment.gradient)
         note_text = f"{gradient_text}  {segment.note or ''}".strip()
         if note_text:
             pdf.setFillColor(colors.HexColor("#475569"))
@@ -182,57 +357,38 @@ def _draw_grid(
     min_km: float,
     max_km: float,
     label_right: float,
+    batched: bool = True,
 ) -> None:
     width = right - left
     height = top - bottom
+    pen = _Pen(pdf, batched)
 
-    pdf.setFillColor(colors.white)
+    pen.fill_color(colors.white)
     pdf.rect(left, bottom, width, height, fill=True, stroke=False)
-    pdf.setStrokeColor(colors.black)
+    pen.stroke_color(colors.black)
     pdf.rect(left, bottom, width, height, fill=False, stroke=True)
 
-    total_minutes = max((end_time - start_time).total_seconds() / 60, 1.0)
-    minute_step = 5
-    total_steps = int(math.ceil(total_minutes / minute_step))
+    major_color = colors.HexColor("#94a3b8")
+    label_color = colors.HexColor("#475569")
+    station_color = colors.HexColor("#d1d5db")
 
-    for idx in range(total_steps + 1):
-        minute = idx * minute_step
-        ratio = min(minute / total_minutes, 1)
+    for ratio, is_major, label in time_ticks(start_time, end_time):
         x = left + ratio * width
-        is_major = minute % 15 == 0 or idx == 0 or idx == total_steps
-        pdf.setStrokeColor(colors.lightgrey if not is_major else colors.HexColor("#94a3b8"))
-        pdf.setLineWidth(0.4 if is_major else 0.2)
-        if not is_major:
-            pdf.setDash(1, 2)
+        if is_major:
+            pen.line(x, bottom, x, top, major_color, 0.4)
         else:
-            pdf.setDash([])
-        pdf.line(x, bottom, x, top)
-
-        if idx == total_steps:
-            label_dt = end_time
-        else:
-            label_dt = start_time + timedelta(minutes=minute)
-        pdf.setFont("Helvetica", 7)
-        pdf.setFillColor(colors.HexColor("#475569"))
-        pdf.drawCentredString(x, top + 10, label_dt.strftime("%H:%M"))
-        pdf.drawCentredString(x, bottom - 14, label_dt.strftime("%H:%M"))
-
-    pdf.setDash([])
+            pen.line(x, bottom, x, top, colors.lightgrey, 0.2, (1, 2))
+        pen.label(x, top + 10, label, "Helvetica", 7, label_color)
+        pen.label(x, bottom - 14, label, "Helvetica", 7, label_color)
 
     for station in route.stations:
-        y = _km_to_y(station.kilometer, min_km, max_km, bottom, top)
-        pdf.setStrokeColor(colors.HexColor("#d1d5db"))
-        pdf.setLineWidth(0.25)
-        pdf.setDash(1, 2)
-        pdf.line(left, y, right, y)
-        pdf.setDash([])
-
-        pdf.setFont("Helvetica-Bold", 8)
-        pdf.setFillColor(colors.black)
-        pdf.drawRightString(label_right, y + 4, station.name)
-        pdf.setFont("Helvetica", 7)
-        pdf.setFillColor(colors.HexColor("#475569"))
-        pdf.drawRightString(label_right, y - 6, f"{station.kilometer:.1f} km")
+        y = km_to_y(station.kilometer, min_km, max_km, bottom, top)
+        pen.line(left, y, right, y, station_color, 0.25, (1, 2))
+        pen.label(label_right, y + 4, station.name, "Helvetica-Bold", 8, colors.black, align="right")
+        pen.label(label_right, y - 6, f"{station.kilometer:.1f} km", "Helvetica", 7, label_color, align="right")
+
+    pen.flush()
+    pen.dash(())
 
 
 def _draw_speed_profile(
@@ -249,11 +405,11 @@ def _draw_speed_profile(
         return
 
     for segment in segments:
-        y_start = _km_to_y(segment.km_start, min_km, max_km, bottom, top)
-        y_end = _km_to_y(segment.km_end, min_km, max_km, bottom, top)
+        y_start = km_to_y(segment.km_start, min_km, max_km, bottom, top)
+        y_end = km_to_y(segment.km_end, min_km, max_km, bottom, top)
         y_low = min(y_start, y_end)
         height = max(abs(y_end - y_start), 1.5)
-        color = _color_for_speed(segment.speed_limit)
+        color = colors.HexColor(speed_color(segment.speed_limit))
 
         pdf.setFillColor(color)
         pdf.rect(bar_x, y_low, bar_width, height, fill=True, stroke=False)
@@ -262,7 +418,7 @@ def _draw_speed_profile(
         pdf.setFillColor(colors.white if segment.speed_limit >= 120 else colors.black)
         pdf.drawCentredString(bar_x + bar_width / 2, y_low + height / 2 + 3, str(segment.speed_limit))
         pdf.setFont("Helvetica", 6)
-        pdf.drawCentredString(bar_x + bar_width / 2, y_low + height / 2 - 6, _format_gradient(segment.gradient))
+        pdf.drawCentredString(bar_x + bar_width / 2, y_low + height / 2 - 6, format_gradient(segment.gradient))
 
     pdf.setFillColor(colors.black)
 
@@ -279,114 +435,34 @@ def _draw_run_path(
     end_time: datetime,
     min_km: float,
     max_km: float,
+    batched: bool = True,
 ) -> None:
-    points = _collect_run_points(timetable, station_index)
+    points = collect_run_points(timetable, station_index)
     if not points:
         return
 
-    total_minutes = max((end_time - start_time).total_seconds() / 60, 1.0)
-    width = right - left
-    height = top - bottom
-    km_span = max(max_km - min_km, 0.5)
+    minutes = total_minutes(start_time, end_time)
+    pen = _Pen(pdf, batched)
+    path_color = colors.HexColor("#38bdf8")
+    marker_color = colors.HexColor("#1e293b")
 
     path = pdf.beginPath()
     marker_points: List[Tuple[float, float]] = []
     for idx, (time_point, kilometer) in enumerate(points):
-        minutes_from_start = (time_point - start_time).total_seconds() / 60
-        ratio_time = min(max(minutes_from_start / total_minutes, 0), 1)
-        ratio_km = (kilometer - min_km) / km_span
-        x = left + ratio_time * width
-        y = bottom + ratio_km * height
+        x = time_to_x(time_point, start_time, minutes, left, right)
+        y = km_to_y(kilometer, min_km, max_km, bottom, top)
         marker_points.append((x, y))
         if idx == 0:
             path.moveTo(x, y)
         else:
             path.lineTo(x, y)
 
-    pdf.setStrokeColor(colors.HexColor("#38bdf8"))
-    pdf.setLineWidth(1.8)
-    pdf.setDash([])
+    pen.stroke_color(path_color)
+    pen.line_width(1.8)
+    pen.dash(())
     pdf.drawPath(path, stroke=1, fill=0)
 
-    pdf.setFillColor(colors.white)
     for x, y in marker_points:
-        pdf.circle(x, y, 2.4, stroke=1, fill=1)
-        pdf.setFillColor(colors.HexColor("#1e293b"))
-        pdf.circle(x, y, 1.2, stroke=0, fill=1)
-        pdf.setFillColor(colors.white)
-
-
-def _collect_run_points(timetable: Timetable, station_index: Dict[str, Station]) -> List[Tuple[datetime, float]]:
-    points: List[Tuple[datetime, float]] = []
-    for entry in timetable.entries:
-        station = station_index.get(entry.station_id)
-        if not station:
-            continue
-        kilometer = station.kilometer
-        if entry.departure:
-            points.append((entry.departure, kilometer))
-        if entry.arrival:
-            points.append((entry.arrival, kilometer))
-    points.sort(key=lambda item: item[0])
-    return points
-
-
-def _time_bounds(timetable: Timetable) -> Tuple[datetime, datetime]:
-    times: List[datetime] = []
-    for entry in timetable.entries:
-        if entry.arrival:
-            times.append(entry.arrival)
-        if entry.departure:
-            times.append(entry.departure)
-    if not times:
-        now = datetime.now()
-        return now, now + timedelta(minutes=10)
-    start = min(times)
-    end = max(times)
-    if start == end:
-        end = start + timedelta(minutes=10)
-    return start, end
-
-
-def _km_bounds(route: Route) -> Tuple[float, float]:
-    kilometers = [station.kilometer for station in route.stations]
-    if not kilometers:
-        return 0.0, 1.0
-    min_km = min(kilometers)
-    max_km = max(kilometers)
-    if min_km == max_km:
-        max_km += 1.0
-    return min_km, max_km
-
-
-def _km_to_y(km: float, min_km: float, max_km: float, bottom: float, top: float) -> float:
-    ratio = (km - min_km) / max(max_km - min_km, 0.5)
-    return bottom + ratio * (top - bottom)
-
-
-def _color_for_speed(speed: int):
-    if speed >= 230:
-        return colors.HexColor("#1d4ed8")
-    if speed >= 200:
-        return colors.HexColor("#2563eb")
-    if speed >= 160:
-        return colors.HexColor("#3b82f6")
-    if speed >= 120:
-        return colors.HexColor("#0ea5e9")
-    if speed >= 80:
-        return colors.HexColor("#10b981")
-    return colors.HexColor("#f97316")
-
-
-def _format_gradient(value: Optional[int]) -> str:
-    if value is None:
-        return "0‰"
-    return f"{'+' if value > 0 else ''}{value}‰"
-
-
-def _duration_text(start: datetime, end: datetime) -> str:
-    minutes = int((end - start).total_seconds() / 60)
-    hours, mins = divmod(minutes, 60)
-    if hours:
-        return f"{hours}h {mins}m"
-    return f"{mins} Minuten"
+        pen.circle(x, y, 2.4, colors.white, stroke=path_color, width=1.8)
+        pen.circle(x, y, 1.2, marker_color)
+    pen.flush()
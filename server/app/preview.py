@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from datetime import datetime
+from functools import lru_cache
+from html import escape
+from typing import List, Optional, Tuple
+
+from .diagram import (
+    collect_run_points,
+    format_gradient,
+    km_bounds,
+    km_range,
+    km_to_y,
+    speed_color,
+    time_bounds,
+    time_ticks,
+    time_to_x,
+    total_minutes,
+)
+from .models import Route, Timetable
+
+WIDTH = 960
+HEIGHT = 540
+MARGIN = 24
+SPEED_BAR_X = MARGIN
+SPEED_BAR_WIDTH = 8
+STATION_LABEL_WIDTH = 110
+GRAPH_LEFT = SPEED_BAR_X + SPEED_BAR_WIDTH + STATION_LABEL_WIDTH
+GRAPH_RIGHT = WIDTH - MARGIN
+GRAPH_TOP = MARGIN + 12
+GRAPH_BOTTOM = HEIGHT - MARGIN - 12
+LABEL_RIGHT = GRAPH_LEFT - 8
+
+_StationKey = Tuple[Tuple[str, float], ...]
+_SegmentKey = Tuple[Tuple[float, float, int, Optional[int]], ...]
+
+_STYLE = (
+    "<style>"
+    "text{font-family:Helvetica,Arial,sans-serif;font-size:7px;fill:#475569}"
+    ".st{font-weight:bold;font-size:8px;fill:#000}"
+    ".sp{font-weight:bold;font-size:7px;text-anchor:middle}"
+    ".t{text-anchor:middle}.r{text-anchor:end}"
+    ".mj{stroke:#94a3b8;stroke-width:.4}"
+    ".mn{stroke:#d3d3d3;stroke-width:.2;stroke-dasharray:1 2}"
+    ".sl{stroke:#d1d5db;stroke-width:.25;stroke-dasharray:1 2}"
+    ".run{fill:none;stroke:#38bdf8;stroke-width:1.8}"
+    ".mo{fill:#fff;stroke:#38bdf8;stroke-width:1.8}.mi{fill:#1e293b}"
+    "</style>"
+)
+
+
+def build_timetable_svg(timetable: Timetable, route: Route) -> str:
+    """Renders the time/kilometre diagram of the PDF as a standalone SVG.
+
+    Only the run path is built per call; the route layer (station lines,
+    labels and speed profile) and the time grid are cached by their inputs.
+    """
+    start_time, end_time = time_bounds(timetable)
+    stations: _StationKey = tuple((station.name, station.kilometer) for station in route.stations)
+    segments: _SegmentKey = tuple(
+        (segment.km_start, segment.km_end, segment.speed_limit, segment.gradient) for segment in route.segments
+    )
+    return "".join(
+        (
+            f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {WIDTH} {HEIGHT}" '
+            f'width="{WIDTH}" height="{HEIGHT}">',
+            _STYLE,
+            f'<rect x="0" y="0" width="{WIDTH}" height="{HEIGHT}" fill="#fff"/>',
+            _time_layer(start_time, end_time),
+            _route_layer(stations, segments),
+            _run_layer(timetable, route, start_time, end_time),
+            "</svg>",
+        )
+    )
+
+
+@lru_cache(maxsize=256)
+def _time_layer(start_time: datetime, end_time: datetime) -> str:
+    parts: List[str] = [
+        f'<rect x="{GRAPH_LEFT}" y="{GRAPH_TOP}" width="{GRAPH_RIGHT - GRAPH_LEFT}" '
+        f'height="{GRAPH_BOTTOM - GRAPH_TOP}" fill="none" stroke="#000"/>'
+    ]
+    major: List[str] = []
+    minor: List[str] = []
+    labels: List[str] = []
+    for ratio, is_major, label in time_ticks(start_time, end_time):
+        x = GRAPH_LEFT + ratio * (GRAPH_RIGHT - GRAPH_LEFT)
+        (major if is_major else minor).append(f"M{x:.1f} {GRAPH_TOP}V{GRAPH_BOTTOM}")
+        labels.append(f'<text x="{x:.1f}" y="{GRAPH_TOP - 6}">{label}</text>')
+        labels.append(f'<text x="{x:.1f}" y="{GRAPH_BOTTOM + 12}">{label}</text>')
+    if minor:
+        parts.append(f'<path class="mn" d="{"".join(minor)}"/>')
+    parts.append(f'<path class="mj" d="{"".join(major)}"/>')
+    parts.append(f'<g class="t">{"".join(labels)}</g>')
+    return "".join(parts)
+
+
+@lru_cache(maxsize=64)
+def _route_layer(stations: _StationKey, segments: _SegmentKey) -> str:
+    min_km, max_km = km_range(kilometer for _, kilometer in stations)
+    lines: List[str] = []
+    labels: List[str] = []
+    for name, kilometer in stations:
+        y = km_to_y(kilometer, min_km, max_km, GRAPH_BOTTOM, GRAPH_TOP)
+        lines.append(f"M{GRAPH_LEFT} {y:.1f}H{GRAPH_RIGHT}")
+        labels.append(f'<text class="st" x="{LABEL_RIGHT}" y="{y - 4:.1f}">{escape(name)}</text>')
+        labels.append(f'<text x="{LABEL_RIGHT}" y="{y + 6:.1f}">{kilometer:.1f} km</text>')
+
+    bars: List[str] = []
+    for km_start, km_end, speed_limit, gradient in segments:
+        y_start = km_to_y(km_start, min_km, max_km, GRAPH_BOTTOM, GRAPH_TOP)
+        y_end = km_to_y(km_end, min_km, max_km, GRAPH_BOTTOM, GRAPH_TOP)
+        y_low = min(y_start, y_end)
+        height = max(abs(y_end - y_start), 1.5)
+        centre_x = SPEED_BAR_X + SPEED_BAR_WIDTH / 2
+        text_color = "#fff" if speed_limit >= 120 else "#000"
+        bars.append(
+            f'<rect x="{SPEED_BAR_X}" y="{y_low:.1f}" width="{SPEED_BAR_WIDTH}" height="{height:.1f}" '
+            f'fill="{speed_color(speed_limit)}"/>'
+            f'<text class="sp" x="{centre_x}" y="{y_low + height / 2:.1f}" style="fill:{text_color}">'
+            f"{speed_limit}</text>"
+            f'<text class="t" x="{centre_x}" y="{y_low + height / 2 + 8:.1f}" style="fill:{text_color};font-size:6px">'
+            f"{format_gradient(gradient)}</text>"
+        )
+
+    return (
+        f'<path class="sl" d="{"".join(lines)}"/>'
+        f'<g class="r">{"".join(labels)}</g>'
+        f'<g>{"".join(bars)}</g>'
+    )
+
+
+def _run_layer(timetable: Timetable, route: Route, start_time: datetime, end_time: datetime) -> str:
+    station_index = {station.id: station for station in route.stations}
+    points = collect_run_points(timetable, station_index)
+    if not points:
+        return ""
+
+    min_km, max_km = km_bounds(route)
+    minutes = total_minutes(start_time, end_time)
+    coordinates = [
+        (
+            time_to_x(time_point, start_time, minutes, GRAPH_LEFT, GRAPH_RIGHT),
+            km_to_y(kilometer, min_km, max_km, GRAPH_BOTTOM, GRAPH_TOP),
+        )
+        for time_point, kilometer in points
+    ]
+    polyline = " ".join(f"{x:.1f},{y:.1f}" for x, y in coordinates)
+    outer = "".join(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="2.4"/>' for x, y in coordinates)
+    inner = "".join(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="1.2"/>' for x, y in coordinates)
+    return f'<polyline class="run" points="{polyline}"/><g class="mo">{outer}</g><g class="mi">{inner}</g>'
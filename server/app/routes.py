@@ -1,26 +1,47 @@
 from __future__ import annotations
 
+import copy
 import io
+import os
+import tempfile
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from flask import Blueprint, Response, jsonify, render_template, request, send_file
+from flask import Blueprint, Response, current_app, jsonify, render_template, request, send_file, stream_with_context
 
+from .categories import get_category, list_categories, list_vehicles
+from .compact import COMPACT_MIMETYPE, encode_timetable, wants_compact
+from .dump import DumpFormatError, DumpReader, iter_dump_chunks, save_stream
 from .models import (
+    MAX_DWELL_MINUTES,
     Route,
     Station,
+    StopRules,
     Timetable,
     TimetableEntry,
     TrackSegment,
+    TrainCategory,
+    Vehicle,
     generate_base_timetable,
+    counter_state,
+    restore_counter_state,
 )
-from .pdf import build_timetable_pdf
+from .preview import build_timetable_svg
 from .storage import storage
 
 page_bp = Blueprint("pages", __name__)
 api_bp = Blueprint("api", __name__)
 
 
+@dataclass
+class _Generation:
+    start_time: datetime
+    dwell_minutes: Optional[float]
+    category: Optional[TrainCategory]
+    stop_rules: StopRules
+
+
 @page_bp.route("/")
 def index() -> str:
     return render_template("index.html")
@@ -43,44 +64,153 @@ def create_route() -> Response:
 @api_bp.post("/timetables")
 def create_timetable() -> Response:
     payload = request.get_json() or {}
-    route_id = payload.get("route_id")
-    start_time = payload.get("start_time")
-    dwell = payload.get("dwell_minutes", 2)
-    route = storage.get_route(route_id)
+    route = storage.get_route(payload.get("route_id"))
     if not route:
         return jsonify({"error": "Route not found"}), 404
+    generation, error = _generation_from_payload(payload)
+    if error:
+        return error
+    return _generate_timetable(route, generation)
 
-    timetable = generate_base_timetable(route, datetime.fromisoformat(start_time), dwell)
-    storage.add_timetable(timetable)
-    return jsonify(_timetable_to_dict(timetable)), 201
+
+@api_bp.post("/timetables/through")
+def create_through_timetable() -> Response:
+    payload = request.get_json() or {}
+    generation, error = _generation_from_payload(payload)
+    if error:
+        return error
+    network = storage.route_network()
+    legs = network.find_path(payload.get("from_station", ""), payload.get("to_station", ""))
+    if not legs:
+        return jsonify({"error": "No connection between the stations"}), 404
+
+    # compose() hands out a memoised Route; the stored one must not share it.
+    route = storage.add_route(copy.deepcopy(network.compose(legs)))
+    return _generate_timetable(route, generation)
+
+
+@api_bp.get("/vehicles")
+def list_rolling_stock() -> Response:
+    return jsonify({"vehicles": [_vehicle_to_dict(vehicle) for vehicle in list_vehicles()]})
+
+
+@api_bp.get("/categories")
+def list_train_categories() -> Response:
+    categories = [
+        {
+            "id": category.id,
+            "name": category.name,
+            "max_speed_kmh": category.vmax_kmh,
+            "acceleration": category.acceleration,
+            "default_dwell_minutes": category.default_dwell_minutes,
+            "stops_by_default": category.stops_by_default,
+            "min_stop_spacing_km": category.min_stop_spacing_km,
+            "vehicle": _vehicle_to_dict(category.vehicle),
+        }
+        for category in list_categories()
+    ]
+    return jsonify({"categories": categories})
 
 
 @api_bp.get("/timetables")
 def list_timetables() -> Response:
-    timetables = [_timetable_to_dict(tt) for tt in storage.list_timetables()]
-    return jsonify({"timetables": timetables})
+    route_id = request.args.get("route_id")
+    timetables = [tt for tt in storage.iter_timetables() if route_id is None or tt.route_id == route_id]
+    if wants_compact():
+        routes: Dict[str, Optional[Route]] = {}
+        for timetable in timetables:
+            if timetable.route_id not in routes:
+                routes[timetable.route_id] = storage.get_route(timetable.route_id)
+        encoded = [encode_timetable(tt, routes[tt.route_id]) for tt in timetables]
+        return _compact_response({"timetables": encoded})
+    response = jsonify({"timetables": [_timetable_to_dict(tt) for tt in timetables]})
+    response.vary.add("Accept")
+    return response
 
 
 @api_bp.put("/timetables/<timetable_id>")
 def update_timetable(timetable_id: str) -> Response:
+    # NumPy is only needed for validation; importing it lazily keeps it out of
+    # workers that never validate.
+    from .validation import ValidationIssue, validate_timetable
+
     payload = request.get_json() or {}
     entries_payload = payload.get("entries", [])
     entries: List[TimetableEntry] = []
-    for item in entries_payload:
+    invalid: List[ValidationIssue] = []
+    for idx, item in enumerate(entries_payload):
+        times: Dict[str, Optional[datetime]] = {}
+        for key in ("arrival", "departure"):
+            try:
+                times[key] = _parse_optional_time(item.get(key))
+            except (TypeError, ValueError):
+                times[key] = None
+                invalid.append(
+                    ValidationIssue(idx, item["station_id"], "invalid_time", f"Ungültige Zeitangabe: {item[key]!r}")
+                )
         entry = TimetableEntry(
             station_id=item["station_id"],
             station_name=item["station_name"],
-            arrival=_parse_optional_time(item.get("arrival")),
-            departure=_parse_optional_time(item.get("departure")),
+            arrival=times["arrival"],
+            departure=times["departure"],
             track=item.get("track"),
             remarks=item.get("remarks"),
+            pass_through=bool(item.get("pass_through", False)),
         )
         entries.append(entry)
 
+    existing = storage.get_timetable(timetable_id)
+    if not existing:
+        return jsonify({"error": "Timetable not found"}), 404
+    route = storage.get_route(existing.route_id)
+    if not route:
+        return jsonify({"error": "Route not found"}), 404
+    candidate = Timetable(
+        id=existing.id,
+        route_id=existing.route_id,
+        train_number=existing.train_number,
+        title=existing.title,
+        entries=entries,
+        category_id=existing.category_id,
+    )
+    issues = invalid or validate_timetable(candidate, route)
+    if issues:
+        return jsonify({"error": "Timetable is not valid", "issues": [issue.to_dict() for issue in issues]}), 422
+
     timetable = storage.update_timetable(timetable_id, entries)
+    return _timetable_response(timetable, route)
+
+
+@api_bp.get("/timetables/validation")
+def validate_all_timetables() -> Response:
+    from .validation import validate_timetables
+
+    routes = {route.id: route for route in storage.iter_routes()}
+    results = validate_timetables(storage.iter_timetables(), routes)
+    return jsonify(
+        {
+            "timetables": {
+                timetable_id: [issue.to_dict() for issue in issues]
+                for timetable_id, issues in results.items()
+                if issues
+            },
+            "checked": len(results),
+        }
+    )
+
+
+@api_bp.get("/timetables/<timetable_id>/validation")
+def validate_single_timetable(timetable_id: str) -> Response:
+    timetable = storage.get_timetable(timetable_id)
     if not timetable:
         return jsonify({"error": "Timetable not found"}), 404
-    return jsonify(_timetable_to_dict(timetable))
+    route = storage.get_route(timetable.route_id)
+    if not route:
+        return jsonify({"error": "Route not found"}), 404
+    from .validation import validate_timetable
+
+    issues = validate_timetable(timetable, route)
+    return jsonify({"valid": not issues, "issues": [issue.to_dict() for issue in issues]})
 
 
 @api_bp.get("/timetables/<timetable_id>/pdf")
@@ -92,7 +222,14 @@ def download_pdf(timetable_id: str) -> Response:
     if not route:
         return jsonify({"error": "Route not found"}), 404
 
-    pdf_bytes = build_timetable_pdf(timetable, route)
+    # reportlab is only needed here; importing it lazily keeps JSON-only workers light.
+    from .pdf import DEFAULT_PDF_COMPRESSION, PDF_COMPRESSION_MODES, build_timetable_pdf
+
+    compression = request.args.get("compression", DEFAULT_PDF_COMPRESSION)
+    if compression not in PDF_COMPRESSION_MODES:
+        return jsonify({"error": f"Unknown compression mode: {compression}"}), 400
+
+    pdf_bytes = build_timetable_pdf(timetable, route, compression=compression)
     return send_file(
         io.BytesIO(pdf_bytes),
         mimetype="application/pdf",
@@ -101,6 +238,153 @@ def download_pdf(timetable_id: str) -> Response:
     )
 
 
+@api_bp.get("/timetables/<timetable_id>/preview.svg")
+def preview_svg(timetable_id: str) -> Response:
+    timetable = storage.get_timetable(timetable_id)
+    if not timetable:
+        return jsonify({"error": "Timetable not found"}), 404
+    route = storage.get_route(timetable.route_id)
+    if not route:
+        return jsonify({"error": "Route not found"}), 404
+
+    return Response(build_timetable_svg(timetable, route), mimetype="image/svg+xml")
+
+
+@api_bp.get("/export")
+def export_dump() -> Response:
+    chunks = iter_dump_chunks(
+        storage.iter_routes(),
+        storage.iter_timetables(),
+        counter_state(),
+    )
+    return Response(
+        stream_with_context(chunks),
+        mimetype="application/octet-stream",
+        headers={"Content-Disposition": "attachment; filename=buchfahrplan.bfpd"},
+    )
+
+
+@api_bp.post("/import")
+def import_dump() -> Response:
+    handle, path = tempfile.mkstemp(suffix=".bfpd")
+    os.close(handle)
+    try:
+        save_stream(request.stream, path)
+        try:
+            reader = DumpReader(path)
+        except DumpFormatError as exc:
+            return jsonify({"error": str(exc)}), 400
+        with reader:
+            # Decode everything before touching the storage so that a corrupt
+            # dump is rejected as a whole instead of being half imported.
+            try:
+                routes = list(reader.iter_routes())
+                timetables = list(reader.iter_timetables())
+                meta = reader.meta
+            except DumpFormatError as exc:
+                return jsonify({"error": str(exc)}), 400
+        counters = {key: meta.get(key, {}) for key in ("id_counters", "train_numbers")}
+        if not all(_is_counter_map(value) for value in counters.values()):
+            return jsonify({"error": "Dump metadata has invalid counters"}), 400
+        for route in routes:
+            storage.add_route(route)
+        for timetable in timetables:
+            storage.add_timetable(timetable)
+        restore_counter_state(counters)
+        counts = {"routes": len(routes), "timetables": len(timetables)}
+    finally:
+        os.remove(path)
+    return jsonify(counts)
+
+
+def _generation_from_payload(
+    payload: Dict[str, Any],
+) -> Tuple[Optional[_Generation], Optional[Tuple[Response, int]]]:
+    """Checks the generation options before anything is created or stored."""
+    start_time = payload.get("start_time")
+    if not isinstance(start_time, str):
+        return None, (jsonify({"error": "start_time is required"}), 400)
+    try:
+        start = datetime.fromisoformat(start_time)
+    except ValueError:
+        return None, (jsonify({"error": f"Invalid start_time: {start_time}"}), 400)
+
+    category_id = payload.get("category_id")
+    category = get_category(category_id)
+    if category_id and not category:
+        return None, (jsonify({"error": "Train category not found"}), 404)
+    dwell = payload.get("dwell_minutes", None if category_id else 2)
+    if dwell is not None and not _is_dwell(dwell):
+        return None, (jsonify({"error": f"dwell_minutes must be a number from 0 to {MAX_DWELL_MINUTES:g}"}), 400)
+    stop_rules = _stop_rules_from_payload(payload.get("stop_rules") or {})
+    if stop_rules is None:
+        return None, (
+            jsonify({"error": f"stop_rules must map station IDs to minutes (0 to {MAX_DWELL_MINUTES:g}) or null"}),
+            400,
+        )
+    return _Generation(start, dwell, category, stop_rules), None
+
+
+def _generate_timetable(route: Route, generation: _Generation) -> Response:
+    timetable = generate_base_timetable(
+        route,
+        generation.start_time,
+        generation.dwell_minutes,
+        generation.category,
+        generation.stop_rules,
+    )
+    storage.add_timetable(timetable)
+    return _timetable_response(timetable, route, 201)
+
+
+def _is_counter_map(value: Any) -> bool:
+    return isinstance(value, dict) and all(
+        isinstance(number, int) and not isinstance(number, bool) for number in value.values()
+    )
+
+
+def _is_dwell(value: Any) -> bool:
+    """Dwell times must stay within what validation accepts on save."""
+    return (
+        isinstance(value, (int, float)) and not isinstance(value, bool) and 0 <= value <= MAX_DWELL_MINUTES
+    )
+
+
+def _stop_rules_from_payload(rules: Any) -> Optional[StopRules]:
+    if not isinstance(rules, dict):
+        return None
+    for dwell in rules.values():
+        if dwell is not None and not _is_dwell(dwell):
+            return None
+    return tuple(sorted((str(station_id), dwell) for station_id, dwell in rules.items()))
+
+
+def _vehicle_to_dict(vehicle: Vehicle) -> Dict[str, Any]:
+    return {
+        "id": vehicle.id,
+        "name": vehicle.name,
+        "max_speed_kmh": vehicle.max_speed_kmh,
+        "acceleration": vehicle.acceleration,
+    }
+
+
+def _timetable_response(timetable: Timetable, route: Route, status: int = 200) -> Response:
+    if wants_compact():
+        response = _compact_response(encode_timetable(timetable, route))
+    else:
+        response = jsonify(_timetable_to_dict(timetable))
+        response.vary.add("Accept")
+    response.status_code = status
+    return response
+
+
+def _compact_response(payload: Dict[str, Any]) -> Response:
+    response = current_app.json.response(payload)
+    response.mimetype = COMPACT_MIMETYPE
+    response.vary.add("Accept")
+    return response
+
+
 def _route_to_dict(route: Route) -> Dict[str, Any]:
     return {
         "id": route.id,
@@ -108,6 +392,7 @@ def _route_to_dict(route: Route) -> Dict[str, Any]:
         "description": route.description,
         "country": route.country,
         "estimated_speed_kmh": route.estimated_speed_kmh,
+        "composed_of": route.composed_of,
         "stations": [
             {
                 "id": station.id,
@@ -169,6 +454,7 @@ def _timetable_to_dict(timetable: Timetable) -> Dict[str, Any]:
         "route_id": timetable.route_id,
         "train_number": timetable.train_number,
         "title": timetable.title,
+        "category_id": timetable.category_id,
         "entries": [
             {
                 "station_id": entry.station_id,
@@ -177,6 +463,7 @@ def _timetable_to_dict(timetable: Timetable) -> Dict[str, Any]:
                 "departure": entry.departure.isoformat() if entry.departure else None,
                 "track": entry.track,
                 "remarks": entry.remarks,
+                "pass_through": entry.pass_through,
             }
             for entry in timetable.entries
         ],
@@ -1,4 +1,5 @@
 const routeSelect = document.querySelector("#route-select");
+const categorySelect = document.querySelector("#category-select");
 const startTimeInput = document.querySelector("#start-time");
 const dwellInput = document.querySelector("#dwell");
 const generateBtn = document.querySelector("#generate-btn");
@@ -7,14 +8,18 @@ const downloadBtn = document.querySelector("#download-btn");
 const tableBody = document.querySelector("#timetable-table tbody");
 const rowTemplate = document.querySelector("#row-template");
 const segmentsTableBody = document.querySelector("#segments-table tbody");
+const previewImg = document.querySelector("#preview-img");
 
 const routesById = new Map();
 
+// Timetables are fetched in the compact wire format (see app/compact.py).
+const COMPACT_TYPE = "application/vnd.buchfahrplan.compact+json";
+
 let currentTimetable = null;
 
 document.addEventListener("DOMContentLoaded", async () => {
   startTimeInput.value = defaultStartTime();
-  await loadRoutes();
+  await Promise.all([loadRoutes(), loadCategories()]);
 });
 
 routeSelect.addEventListener("change", () => {
@@ -37,18 +42,21 @@ generateBtn.addEventListener("click", async () => {
   try {
     const response = await fetch("/api/timetables", {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: { "Content-Type": "application/json", Accept: COMPACT_TYPE },
       body: JSON.stringify({
         route_id: routeId,
         start_time: toFullIso(startTime),
-        dwell_minutes: Number.parseInt(dwellInput.value || "2", 10),
+        // With a train category the dwell times come from its stop rules.
+        dwell_minutes: categorySelect.value ? undefined : Number.parseInt(dwellInput.value || "2", 10),
+        category_id: categorySelect.value || null,
       }),
     });
     if (!response.ok) {
       throw new Error("Fehler beim Erstellen des Fahrplans.");
     }
-    currentTimetable = await response.json();
+    currentTimetable = await readTimetable(response);
     renderTable(currentTimetable.entries);
+    refreshPreview();
     toggleActions(true);
   } catch (error) {
     console.error(error);
@@ -65,11 +73,17 @@ saveBtn.addEventListener("click", async () => {
   try {
     const response = await fetch(`/api/timetables/${currentTimetable.id}`, {
       method: "PUT",
-      headers: { "Content-Type": "application/json" },
+      headers: { "Content-Type": "application/json", Accept: COMPACT_TYPE },
       body: JSON.stringify(payload),
     });
+    if (response.status === 422) {
+      const { issues } = await response.json();
+      alert(`Fahrplan ist nicht plausibel:\n${formatIssues(issues)}`);
+      return;
+    }
     if (!response.ok) throw new Error();
-    currentTimetable = await response.json();
+    currentTimetable = await readTimetable(response);
+    refreshPreview();
     alert("Fahrplan gespeichert.");
   } catch {
     alert("Speichern fehlgeschlagen.");
@@ -103,6 +117,61 @@ async function loadRoutes() {
   }
 }
 
+async function loadCategories() {
+  try {
+    const response = await fetch("/api/categories");
+    const data = await response.json();
+    data.categories.forEach((category) => {
+      const option = document.createElement("option");
+      option.value = category.id;
+      option.textContent = `${category.name} – ${category.vehicle.name} (Vmax ${category.max_speed_kmh} km/h)`;
+      categorySelect.append(option);
+    });
+  } catch (error) {
+    console.error(error);
+  }
+}
+
+async function readTimetable(response) {
+  const data = await response.json();
+  const contentType = response.headers.get("Content-Type") || "";
+  return contentType.startsWith(COMPACT_TYPE) ? decodeCompactTimetable(data) : data;
+}
+
+function decodeCompactTimetable(data) {
+  const stations = routesById.get(data.route_id)?.stations ?? [];
+  const base = data.base ? new Date(data.base).getTime() : null;
+  const passThrough = new Set(data.pass_through);
+  let position = 0;
+  let micros = 0;
+  const decodeTime = (offset) => {
+    if (offset === null || base === null) return null;
+    micros += Math.round(offset * 1e6);
+    return new Date(base + Math.floor(micros / 1000)).toISOString();
+  };
+  const entries = data.stations.map((delta, index) => {
+    position += delta;
+    const [stationId, stationName] = data.overrides[index] ?? [stations[position]?.id, stations[position]?.name];
+    return {
+      station_id: stationId,
+      station_name: stationName,
+      arrival: decodeTime(data.times[2 * index]),
+      departure: decodeTime(data.times[2 * index + 1]),
+      track: data.tracks[index] ?? null,
+      remarks: data.remarks[index] ?? null,
+      pass_through: passThrough.has(index),
+    };
+  });
+  return {
+    id: data.id,
+    route_id: data.route_id,
+    train_number: data.train_number,
+    title: data.title,
+    category_id: data.category_id,
+    entries,
+  };
+}
+
 function renderTable(entries) {
   tableBody.innerHTML = "";
   entries.forEach((entry) => {
@@ -112,6 +181,8 @@ function renderTable(entries) {
     row.dataset.stationName = entry.station_name;
     row.dataset.arrivalIso = entry.arrival || "";
     row.dataset.departureIso = entry.departure || "";
+    row.dataset.passThrough = entry.pass_through ? "true" : "";
+    row.classList.toggle("pass-through", Boolean(entry.pass_through));
 
     fragment.querySelector(".station").textContent = entry.station_name;
 
@@ -121,6 +192,7 @@ function renderTable(entries) {
     const remarksInput = fragment.querySelector(".remarks");
 
     arrivalInput.value = entry.arrival ? toTime(entry.arrival) : "";
+    arrivalInput.disabled = Boolean(entry.pass_through);
     departureInput.value = entry.departure ? toTime(entry.departure) : "";
     trackInput.value = entry.track || "";
     remarksInput.value = entry.remarks || "";
@@ -143,6 +215,7 @@ function collectEntries() {
       departure: normalizeTime(departureInput.value, row.dataset.departureIso),
       track: trackInput.value || null,
       remarks: remarksInput.value || null,
+      pass_through: row.dataset.passThrough === "true",
     };
   });
 }
@@ -164,6 +237,22 @@ function renderSegments(routeId) {
   });
 }
 
+function formatIssues(issues) {
+  const rows = Array.from(tableBody.querySelectorAll("tr"));
+  return issues
+    .map((issue) => {
+      const station = rows[issue.entry_index]?.dataset.stationName ?? issue.station_id;
+      return `• ${station}: ${issue.message}`;
+    })
+    .join("\n");
+}
+
+function refreshPreview() {
+  if (!currentTimetable) return;
+  previewImg.src = `/api/timetables/${currentTimetable.id}/preview.svg?t=${Date.now()}`;
+  previewImg.hidden = false;
+}
+
 function normalizeTime(timeValue, fallbackIso) {
   if (!timeValue) return null;
   const base = fallbackIso ? new Date(fallbackIso) : new Date();
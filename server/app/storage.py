@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import os
+import pickle
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 
+from .dump import DumpReader
 from .models import (
     Route,
     Station,
@@ -10,14 +13,45 @@ from .models import (
     TimetableEntry,
     TrackSegment,
     generate_base_timetable,
+    counter_state,
+    restore_counter_state,
 )
+from .network import RouteNetwork, build_network
+
+SNAPSHOT_ENV = "BUCHFAHRPLAN_SNAPSHOT"
+DUMP_ENV = "BUCHFAHRPLAN_DUMP"
+SNAPSHOT_VERSION = 1
 
 
 class InMemoryStorage:
-    def __init__(self) -> None:
+    def __init__(self, snapshot_path: Optional[str] = None) -> None:
         self.routes: Dict[str, Route] = {}
         self.timetables: Dict[str, Timetable] = {}
-        self._bootstrap()
+        self._network: Optional[RouteNetwork] = None
+        if snapshot_path and os.path.exists(snapshot_path):
+            self._load_snapshot(snapshot_path)
+        else:
+            self._bootstrap()
+
+    def save_snapshot(self, path: str) -> None:
+        """Writes the current state as a pickle that ``__init__`` can start from."""
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "routes": self.routes,
+            "timetables": self.timetables,
+            **counter_state(),
+        }
+        with open(path, "wb") as handle:
+            pickle.dump(snapshot, handle, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _load_snapshot(self, path: str) -> None:
+        with open(path, "rb") as handle:
+            snapshot = pickle.load(handle)
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version in {path}: {snapshot.get('version')}")
+        self.routes = snapshot["routes"]
+        self.timetables = snapshot["timetables"]
+        restore_counter_state(snapshot)
 
     def _bootstrap(self) -> None:
         westbahn = Route(
@@ -126,12 +160,70 @@ class InMemoryStorage:
             ],
         )
 
+        salzburg_muenchen = Route(
+            id="sm",
+            name="Salzburg – München",
+            description="Grenzüberschreitende Hauptstrecke über Rosenheim",
+            country="DE",
+            estimated_speed_kmh=130,
+            stations=[
+                Station(id="sm-1", name="Salzburg Hbf", kilometer=0.0),
+                Station(id="sm-2", name="Freilassing", kilometer=6.6),
+                Station(id="sm-3", name="Traunstein", kilometer=35.8),
+                Station(id="sm-4", name="Prien am Chiemsee", kilometer=57.4),
+                Station(id="sm-5", name="Rosenheim", kilometer=88.3),
+                Station(id="sm-6", name="München Ost", kilometer=146.4),
+                Station(id="sm-7", name="München Hbf", kilometer=153.0),
+            ],
+            segments=[
+                TrackSegment(
+                    id="sm-s1",
+                    km_start=0.0,
+                    km_end=6.6,
+                    speed_limit=100,
+                    gradient=1,
+                    note="Saalachbrücke – Grenze AT/DE",
+                ),
+                TrackSegment(
+                    id="sm-s2",
+                    km_start=6.6,
+                    km_end=88.3,
+                    speed_limit=160,
+                    gradient=-3,
+                    note="Chiemgau",
+                ),
+                TrackSegment(
+                    id="sm-s3",
+                    km_start=88.3,
+                    km_end=146.4,
+                    speed_limit=160,
+                    gradient=2,
+                    note="Mangfalltal – Grafing",
+                ),
+                TrackSegment(
+                    id="sm-s4",
+                    km_start=146.4,
+                    km_end=153.0,
+                    speed_limit=80,
+                    gradient=0,
+                    note="Einfahrt München",
+                ),
+            ],
+        )
+
         self.routes[westbahn.id] = westbahn
         self.routes[s3_route.id] = s3_route
+        self.routes[salzburg_muenchen.id] = salzburg_muenchen
 
         base_tt = generate_base_timetable(westbahn, datetime.fromisoformat("2024-01-01T08:00:00"))
         self.timetables[base_tt.id] = base_tt
 
+    def iter_routes(self) -> Iterator[Route]:
+        return iter(list(self.routes.values()))
+
+    def iter_timetables(self) -> Iterator[Timetable]:
+        return iter(list(self.timetables.values()))
+
     def list_routes(self) -> List[Route]:
         return list(self.routes.values())
 
@@ -140,8 +232,18 @@ class InMemoryStorage:
 
     def add_route(self, route: Route) -> Route:
         self.routes[route.id] = route
+        # Composed routes are not part of the network, so storing a through
+        # route keeps it unless it replaces a plain one.
+        if self._network is not None and (not route.composed_of or route.id in self._network.routes):
+            self._network = None
         return route
 
+    def route_network(self) -> RouteNetwork:
+        """Station graph over all plain routes, rebuilt only after one was added."""
+        if self._network is None:
+            self._network = build_network(self.iter_routes())
+        return self._network
+
     def list_timetables(self) -> List[Timetable]:
         return list(self.timetables.values())
 
@@ -160,4 +262,58 @@ class InMemoryStorage:
         return timetable
 
 
-storage = InMemoryStorage()
+class MappedStorage(InMemoryStorage):
+    """Serves routes and timetables from a memory-mapped dump file.
+
+    The dump itself is never written; added or edited objects are kept in
+    ``routes``/``timetables`` and shadow the dumped records with the same ID.
+    """
+
+    def __init__(self, dump_path: str) -> None:
+        self.routes = {}
+        self.timetables = {}
+        self._network = None
+        self.dump = DumpReader(dump_path)
+        restore_counter_state(self.dump.meta)
+
+    def iter_routes(self) -> Iterator[Route]:
+        yield from super().iter_routes()
+        for route in self.dump.iter_routes():
+            if route.id not in self.routes:
+                yield route
+
+    def iter_timetables(self) -> Iterator[Timetable]:
+        yield from super().iter_timetables()
+        for timetable in self.dump.iter_timetables():
+            if timetable.id not in self.timetables:
+                yield timetable
+
+    def list_routes(self) -> List[Route]:
+        return list(self.iter_routes())
+
+    def get_route(self, route_id: str) -> Optional[Route]:
+        return self.routes.get(route_id) or self.dump.get_route(route_id)
+
+    def list_timetables(self) -> List[Timetable]:
+        return list(self.iter_timetables())
+
+    def get_timetable(self, timetable_id: str) -> Optional[Timetable]:
+        return self.timetables.get(timetable_id) or self.dump.get_timetable(timetable_id)
+
+    def update_timetable(self, timetable_id: str, entries: List[TimetableEntry]) -> Optional[Timetable]:
+        timetable = self.get_timetable(timetable_id)
+        if not timetable:
+            return None
+        timetable.entries = entries
+        self.timetables[timetable.id] = timetable
+        return timetable
+
+
+def _create_storage() -> InMemoryStorage:
+    dump_path = os.environ.get(DUMP_ENV)
+    if dump_path:
+        return MappedStorage(dump_path)
+    return InMemoryStorage(snapshot_path=os.environ.get(SNAPSHOT_ENV))
+
+
+storage = _create_storage()
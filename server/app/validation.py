@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .categories import get_category
+from .models import MAX_DWELL_MINUTES, Route, Timetable
+
+DEFAULT_MAX_DWELL_MINUTES = MAX_DWELL_MINUTES
+# Times are edited with minute precision, so a leg may come out up to one
+# minute shorter than planned; speeds are checked against that resolution.
+TIME_RESOLUTION_MINUTES = 1.0
+# Naive times are wall-clock times; measuring them from a fixed naive
+# reference keeps the local timezone (and its DST jumps) out of the check.
+_EPOCH = datetime(1970, 1, 1)
+
+
+@dataclass
+class ValidationIssue:
+    entry_index: int
+    station_id: str
+    code: str
+    message: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def validate_timetable(
+    timetable: Timetable,
+    route: Route,
+    max_dwell_minutes: float = DEFAULT_MAX_DWELL_MINUTES,
+) -> List[ValidationIssue]:
+    return validate_timetables([timetable], {route.id: route}, max_dwell_minutes)[timetable.id]
+
+
+def validate_timetables(
+    timetables: Iterable[Timetable],
+    routes: Dict[str, Route],
+    max_dwell_minutes: float = DEFAULT_MAX_DWELL_MINUTES,
+) -> Dict[str, List[ValidationIssue]]:
+    """Checks many timetables at once; returns the issues per timetable ID.
+
+    Timetables are grouped by route and every check runs as one array
+    operation over all entries of a group.
+    """
+    issues: Dict[str, List[ValidationIssue]] = {}
+    by_route: Dict[str, List[Timetable]] = {}
+    for timetable in timetables:
+        issues[timetable.id] = []
+        by_route.setdefault(timetable.route_id, []).append(timetable)
+
+    for route_id, group in by_route.items():
+        route = routes.get(route_id)
+        if route is None:
+            for timetable in group:
+                issues[timetable.id].append(
+                    ValidationIssue(-1, "", "unknown_route", f"Route {route_id} existiert nicht")
+                )
+            continue
+        _validate_route_group(group, route, max_dwell_minutes, issues)
+    return issues
+
+
+def _validate_route_group(
+    timetables: List[Timetable],
+    route: Route,
+    max_dwell_minutes: float,
+    issues: Dict[str, List[ValidationIssue]],
+) -> None:
+    positions = {station.id: idx for idx, station in enumerate(route.stations)}
+    kilometers = np.array([station.kilometer for station in route.stations] + [np.nan])
+
+    owners: List[int] = []
+    entry_index: List[int] = []
+    station_pos: List[int] = []
+    arrivals: List[float] = []
+    departures: List[float] = []
+    mixed_zones: List[bool] = []
+    for owner, timetable in enumerate(timetables):
+        aware: Optional[bool] = None
+        for idx, entry in enumerate(timetable.entries):
+            owners.append(owner)
+            entry_index.append(idx)
+            station_pos.append(positions.get(entry.station_id, -1))
+            arrivals.append(_minutes(entry.arrival))
+            departures.append(_minutes(entry.departure))
+            zones = [value.utcoffset() is not None for value in (entry.arrival, entry.departure) if value]
+            if aware is None and zones:
+                aware = zones[0]
+            mixed_zones.append(any(zone != aware for zone in zones))
+    if not owners:
+        return
+
+    owner = np.array(owners)
+    category_max = np.array([_category_max_speed(timetable) for timetable in timetables])
+    pos = np.array(station_pos)
+    arrival = np.array(arrivals)
+    departure = np.array(departures)
+    km = kilometers[pos]  # unknown stations (-1) pick the trailing NaN
+    known = pos >= 0
+
+    found: Dict[str, np.ndarray] = {}
+    found["unknown_station"] = ~known
+    # Checked here on one scale, but the diagram, the PDF and the compact
+    # format cannot compare naive with timezone-aware times.
+    found["mixed_timezones"] = np.array(mixed_zones)
+
+    dwell = departure - arrival
+    found["departure_before_arrival"] = dwell < 0
+    found["dwell_too_long"] = dwell > max_dwell_minutes
+
+    # Pairwise checks between consecutive entries of the same timetable,
+    # reported on the later entry.
+    same = owner[1:] == owner[:-1]
+    leave = np.where(np.isnan(departure), arrival, departure)[:-1]
+    reach = np.where(np.isnan(arrival), departure, arrival)[1:]
+    leg_minutes = reach - leave
+    backwards = same & (leg_minutes < 0)
+    found["time_backwards"] = _later(backwards)
+
+    # Each timetable may run either way along the route; its direction is
+    # taken from its first and last entry.
+    run = np.cumsum(np.r_[True, ~same]) - 1
+    starts = np.flatnonzero(np.r_[True, ~same])
+    ends = np.r_[starts[1:] - 1, len(owner) - 1]
+    direction = np.sign(pos[ends] - pos[starts])
+    direction[(direction == 0) | ~known[starts] | ~known[ends]] = 1
+    both_known = same & known[1:] & known[:-1]
+    found["station_order"] = _later(both_known & ((pos[1:] - pos[:-1]) * direction[run[1:]] <= 0))
+
+    if route.segments:
+        seg_start = np.array([min(segment.km_start, segment.km_end) for segment in route.segments])
+        seg_end = np.array([max(segment.km_start, segment.km_end) for segment in route.segments])
+        seg_limit = np.array([segment.speed_limit for segment in route.segments], dtype=float)
+
+        low = np.fmin(km[1:], km[:-1])
+        high = np.fmax(km[1:], km[:-1])
+        limit = _overlapping_max(seg_start, seg_end, seg_limit, low, high)
+        limit = np.where(np.isfinite(limit), np.fmin(limit, category_max[owner[1:]]), limit)
+        distance = high - low
+        with np.errstate(divide="ignore", invalid="ignore"):
+            speed = distance / leg_minutes * 60
+            fastest_allowed = distance / (leg_minutes + TIME_RESOLUTION_MINUTES) * 60
+        checked = both_known & np.isfinite(limit) & (leg_minutes >= 0) & (distance > 0)
+        found["speed_limit_exceeded"] = _later(checked & (fastest_allowed > limit))
+    else:
+        speed = limit = np.full(len(owner) - 1, np.nan)
+
+    for code, mask in found.items():
+        for flat in np.flatnonzero(mask):
+            timetable = timetables[owner[flat]]
+            idx = entry_index[flat]
+            issues[timetable.id].append(
+                ValidationIssue(
+                    entry_index=idx,
+                    station_id=timetable.entries[idx].station_id,
+                    code=code,
+                    message=_message(code, flat, dwell, speed, limit, max_dwell_minutes),
+                )
+            )
+    for timetable in timetables:
+        issues[timetable.id].sort(key=lambda issue: issue.entry_index)
+
+
+def _category_max_speed(timetable: Timetable) -> float:
+    category = get_category(timetable.category_id)
+    return float(category.vmax_kmh) if category else np.inf
+
+
+def _overlapping_max(
+    seg_start: np.ndarray,
+    seg_end: np.ndarray,
+    seg_limit: np.ndarray,
+    low: np.ndarray,
+    high: np.ndarray,
+) -> np.ndarray:
+    """Highest limit among the segments overlapping each leg ``(low, high)``.
+
+    The segment boundaries cut the route into pieces that each carry the
+    highest limit covering them; a leg then takes the maximum over the run
+    of pieces it touches. Zero-length segments cover no piece and are looked
+    up as points. Memory stays linear in legs plus segments.
+    """
+    boundaries = np.unique(np.r_[seg_start, seg_end])
+    pieces = np.full(len(boundaries) - 1, -np.inf)
+    for first, last, value in zip(
+        np.searchsorted(boundaries, seg_start), np.searchsorted(boundaries, seg_end), seg_limit
+    ):
+        pieces[first:last] = np.maximum(pieces[first:last], value)
+    first = np.maximum(np.searchsorted(boundaries, low, side="right") - 1, 0)
+    last = np.minimum(np.searchsorted(boundaries, high, side="left"), len(pieces))
+    limit = _range_max(pieces, first, last)
+
+    point = seg_start == seg_end
+    if point.any():
+        order = np.argsort(seg_start[point])
+        points = seg_start[point][order]
+        first = np.searchsorted(points, low, side="right")
+        last = np.searchsorted(points, high, side="left")
+        limit = np.maximum(limit, _range_max(seg_limit[point][order], first, last))
+    return limit
+
+
+def _range_max(values: np.ndarray, first: np.ndarray, last: np.ndarray) -> np.ndarray:
+    """``values[first:last].max()`` per row, ``-inf`` for empty ranges."""
+    padded = np.r_[values, -np.inf]
+    bounds = np.column_stack([first, last]).ravel()
+    result = np.maximum.reduceat(padded, bounds)[::2]
+    return np.where(first < last, result, -np.inf)
+
+
+def _later(pair_mask: np.ndarray) -> np.ndarray:
+    """Maps a mask over consecutive pairs onto the second entry of each pair."""
+    return np.r_[False, pair_mask]
+
+
+def _minutes(value: Optional[datetime]) -> float:
+    if value is None:
+        return np.nan
+    if value.utcoffset() is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) / timedelta(minutes=1)
+
+
+def _message(
+    code: str,
+    flat: int,
+    dwell: np.ndarray,
+    speed: np.ndarray,
+    limit: np.ndarray,
+    max_dwell_minutes: float,
+) -> str:
+    if code == "unknown_station":
+        return "Station liegt nicht auf der Strecke"
+    if code == "mixed_timezones":
+        return "Zeiten mit und ohne Zeitzone gemischt"
+    if code == "departure_before_arrival":
+        return "Abfahrt liegt vor der Ankunft"
+    if code == "dwell_too_long":
+        return f"Aufenthalt {dwell[flat]:.0f} min überschreitet {max_dwell_minutes:.0f} min"
+    if code == "time_backwards":
+        return "Ankunft liegt vor der Abfahrt am vorherigen Halt"
+    if code == "station_order":
+        return "Reihenfolge weicht von der Stationsfolge der Strecke ab"
+    if code == "speed_limit_exceeded":
+        implied = speed[flat - 1]
+        implied_text = "∞" if not np.isfinite(implied) else f"{implied:.0f}"
+        return f"Durchschnitt {implied_text} km/h über Vmax {limit[flat - 1]:.0f} km/h"
+    return code
@@ -0,0 +1,24 @@
+import gc
+import os
+import time
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Load the app (and the storage snapshot) once in the master so workers share
+# those pages copy-on-write instead of each building their own copy.
+preload_app = True
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the collector's reach; otherwise the
+    # first collection in a worker touches (and copies) every shared object.
+    gc.freeze()
+
+
+def pre_fork(server, worker):
+    worker.fork_started = time.perf_counter()
+
+
+def post_worker_init(worker):
+    elapsed_ms = (time.perf_counter() - worker.fork_started) * 1000
+    worker.log.info("Worker %s bereit nach %.1f ms", worker.pid, elapsed_ms)
@@ -0,0 +1,55 @@
+"""Route and timetable shared by the format tests; each test gets fresh objects."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models import Route, Station, Timetable, TimetableEntry, TrackSegment
+
+
+@pytest.fixture
+def route() -> Route:
+    return Route(
+        id="rt",
+        name="Teststrecke",
+        description="Ä–Ö, mit Sonderzeichen",
+        country="AT",
+        estimated_speed_kmh=120,
+        stations=[
+            Station(id="rt-1", name="Anfang", kilometer=0.0, elevation=200),
+            Station(id="rt-2", name="Mitte", kilometer=12.5),
+            Station(id="rt-3", name="Ende", kilometer=30.25, elevation=310),
+        ],
+        segments=[
+            TrackSegment(id="rt-s1", km_start=0.0, km_end=12.5, speed_limit=120, gradient=-4, note="Bogen"),
+            TrackSegment(id="rt-s2", km_start=12.5, km_end=30.25, speed_limit=160),
+        ],
+    )
+
+
+@pytest.fixture
+def timetable() -> Timetable:
+    start = datetime(2024, 3, 31, 1, 58, 30, 250000)
+    return Timetable(
+        id="tt-dump",
+        route_id="rt",
+        train_number="REX 1",
+        title="Test",
+        category_id="REX",
+        entries=[
+            TimetableEntry(station_id="rt-1", station_name="Anfang", arrival=None, departure=start, track="1"),
+            TimetableEntry(
+                station_id="rt-2",
+                station_name="Mitte",
+                arrival=start + timedelta(minutes=7),
+                departure=start + timedelta(minutes=7),
+                pass_through=True,
+            ),
+            TimetableEntry(
+                station_id="rt-3",
+                station_name="Ende",
+                arrival=datetime(2024, 3, 31, 3, 20, tzinfo=timezone(timedelta(hours=2))),
+                departure=None,
+                remarks="Endstation",
+            ),
+        ],
+    )
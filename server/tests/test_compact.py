@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.compact import decode_timetable, encode_timetable
+from app.models import Timetable, TimetableEntry, generate_base_timetable
+from tools.synthetic import synthetic_route
+
+
+@pytest.mark.parametrize("tzinfo", [None, timezone(timedelta(hours=1))])
+def test_round_trip_is_exact(route, tzinfo):
+    start = datetime(2024, 3, 31, 1, 58, 30, 250001, tzinfo=tzinfo)
+    timetable = Timetable(
+        id="tt",
+        route_id=route.id,
+        train_number="REX 1",
+        title="Test",
+        category_id="REX",
+        entries=[
+            TimetableEntry(station_id="rt-1", station_name="Anfang", arrival=None, departure=start, track="1"),
+            TimetableEntry(
+                station_id="rt-2",
+                station_name="Mitte",
+                arrival=start + timedelta(minutes=7, seconds=20),
+                departure=start + timedelta(minutes=7, seconds=20),
+                pass_through=True,
+            ),
+            TimetableEntry(station_id="rt-x", station_name="Umleitung", arrival=None, departure=None),
+            TimetableEntry(
+                station_id="rt-3",
+                station_name="Ende",
+                arrival=start + timedelta(hours=26, microseconds=3),
+                departure=None,
+                remarks="Endstation",
+            ),
+        ],
+    )
+
+    assert decode_timetable(encode_timetable(timetable, route), route) == timetable
+
+
+def test_generated_timetable_round_trips():
+    route = synthetic_route(200)
+    timetable = generate_base_timetable(route, datetime(2024, 5, 1, 5, 0))
+    encoded = encode_timetable(timetable, route)
+
+    assert all(isinstance(offset, int) for offset in encoded["times"] if offset is not None)
+    assert decode_timetable(encoded, route) == timetable
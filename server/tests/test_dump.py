@@ -0,0 +1,81 @@
+from dataclasses import replace
+
+import pytest
+
+from app import create_app
+from app.dump import DumpFormatError, DumpReader, iter_dump_chunks, write_dump
+from app.storage import storage
+
+
+@pytest.fixture
+def dump_bytes(route, timetable) -> bytes:
+    return b"".join(iter_dump_chunks([route], [timetable], {"id_counters": {"tt": 42}}))
+
+
+def test_round_trip(tmp_path, route, timetable):
+    path = tmp_path / "storage.bfpd"
+    write_dump(str(path), [route], [timetable], {"id_counters": {"tt": 42}})
+
+    with DumpReader(str(path)) as reader:
+        assert list(reader.iter_routes()) == [route]
+        assert list(reader.iter_timetables()) == [timetable]
+        assert reader.get_route("rt") == route
+        assert reader.get_timetable("tt-dump") == timetable
+        assert reader.get_route("missing") is None
+        assert reader.meta == {"id_counters": {"tt": 42}}
+
+
+@pytest.mark.parametrize("cut", [1, 10, 100, 200, 400])
+def test_truncated_dump_is_rejected(tmp_path, dump_bytes, cut):
+    data = dump_bytes
+    path = tmp_path / "truncated.bfpd"
+    path.write_bytes(data[: len(data) - cut])
+
+    with pytest.raises(DumpFormatError):
+        with DumpReader(str(path)) as reader:
+            list(reader.iter_routes())
+            list(reader.iter_timetables())
+            reader.meta
+
+
+def test_import_of_truncated_dump_leaves_storage_untouched(dump_bytes):
+    client = create_app().test_client()
+    data = dump_bytes
+    routes_before = len(storage.list_routes())
+    timetables_before = len(storage.list_timetables())
+
+    for cut in (100, 200):
+        response = client.post("/api/import", data=data[: len(data) - cut])
+        assert response.status_code == 400
+        assert "error" in response.get_json()
+
+    assert len(storage.list_routes()) == routes_before
+    assert len(storage.list_timetables()) == timetables_before
+    assert storage.get_timetable("tt-dump") is None
+
+
+def test_composed_of_keeps_ids_with_commas(tmp_path, route):
+    route.composed_of = ["a,b", "c"]
+    path = tmp_path / "composed.bfpd"
+    write_dump(str(path), [route], [])
+
+    with DumpReader(str(path)) as reader:
+        assert reader.get_route("rt").composed_of == ["a,b", "c"]
+
+
+def test_lookup_by_id_uses_sorted_index(tmp_path, route):
+    ids = ["z", "ä", "b-10", "a", "b-2", "dup", "m"]
+    routes = [replace(route, id=route_id, name=f"Strecke {idx}") for idx, route_id in enumerate(ids)]
+    routes.append(replace(route, id="dup", name="Strecke neu"))
+    path = tmp_path / "index.bfpd"
+    write_dump(str(path), routes, [])
+
+    with DumpReader(str(path)) as reader:
+        assert "route_index" in reader._sections
+        for idx, route_id in enumerate(ids[:-2]):
+            assert reader.get_route(route_id).name == f"Strecke {idx}"
+        assert reader.get_route("m").name == "Strecke 6"
+        assert reader.get_route("dup").name == "Strecke neu"
+        for missing in ("", "0", "b", "b-3", "zz", "ö"):
+            assert reader.get_route(missing) is None
+        assert reader.get_timetable("tt-dump") is None
@@ -0,0 +1,85 @@
+import gzip
+
+import pytest
+
+from app import create_app
+from app.middleware import asset_hash
+
+
+@pytest.fixture
+def app():
+    return create_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_unchanged_response_answers_304(client):
+    first = client.get("/api/routes", headers={"Accept-Encoding": "identity"})
+    assert first.status_code == 200 and "Content-Encoding" not in first.headers
+
+    headers = {"Accept-Encoding": "identity", "If-None-Match": first.headers["ETag"]}
+    again = client.get("/api/routes", headers=headers)
+    assert again.status_code == 304
+    assert again.data == b""
+
+
+def test_gzip_response_keeps_a_weak_etag_that_matches(client):
+    plain = client.get("/api/routes", headers={"Accept-Encoding": "identity"})
+    first = client.get("/api/routes", headers={"Accept-Encoding": "gzip"})
+
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(first.data) == plain.data
+    assert first.headers["ETag"] == "W/" + plain.headers["ETag"]
+    for tag in (first.headers["ETag"], plain.headers["ETag"]):
+        again = client.get("/api/routes", headers={"Accept-Encoding": "gzip", "If-None-Match": tag})
+        assert again.status_code == 304
+
+
+def test_small_responses_stay_uncompressed(app, client):
+    app.config["COMPRESS_MIN_SIZE"] = 1 << 30
+    response = client.get("/api/routes", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json()["routes"]
+
+
+def test_compressible_responses_vary_on_accept_encoding(client):
+    for encoding in ("identity", "gzip"):
+        response = client.get("/api/routes", headers={"Accept-Encoding": encoding})
+        assert "Accept-Encoding" in response.vary
+
+
+def test_streamed_export_is_left_alone(client):
+    response = client.get("/api/export", headers={"Accept-Encoding": "gzip"})
+
+    assert response.is_streamed
+    assert "ETag" not in response.headers
+    assert "Content-Encoding" not in response.headers
+    assert response.data.startswith(b"BFPD")
+
+
+def test_hashed_static_url_is_immutable(app, client):
+    with app.test_request_context():
+        digest = asset_hash("js/app.js")
+    assert digest
+
+    current = client.get(f"/static/js/app.js?v={digest}")
+    stale = client.get("/static/js/app.js?v=000000000000")
+    plain = client.get("/static/js/app.js")
+
+    assert current.status_code == stale.status_code == plain.status_code == 200
+    assert current.cache_control.immutable
+    assert current.cache_control.max_age == 365 * 24 * 3600
+    assert not stale.cache_control.immutable
+    assert not plain.cache_control.immutable
+    for response in (current, stale, plain):
+        response.close()
+
+
+def test_page_links_the_hashed_asset(app, client):
+    with app.test_request_context():
+        digest = asset_hash("js/app.js")
+    assert f"js/app.js?v={digest}".encode() in client.get("/").data
@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.categories import get_category
+from app.models import (
+    ACCELERATION_LOSS_MINUTES,
+    Route,
+    Station,
+    TrackSegment,
+    TrainCategory,
+    Vehicle,
+    build_stop_plan,
+    counter_state,
+    generate_base_timetable,
+)
+from app.storage import storage
+from tools.synthetic import synthetic_route
+
+START = datetime(2024, 5, 1, 6, 0)
+
+
+def _category(max_speed_kmh: int = 200, vehicle_kmh: int = 200, acceleration: str = "medium") -> TrainCategory:
+    return TrainCategory(
+        id="T",
+        name="Test",
+        vehicle=Vehicle(id="v", name="Testfahrzeug", max_speed_kmh=vehicle_kmh, acceleration=acceleration),
+        max_speed_kmh=max_speed_kmh,
+        default_dwell_minutes=2.0,
+        number_base=100,
+    )
+
+
+def _open_line(limit_kmh: int = 250) -> Route:
+    """Three stations 60 km apart, all of it under one speed limit."""
+    return Route(
+        id="open",
+        name="Freie Strecke",
+        description="",
+        country="AT",
+        estimated_speed_kmh=300,
+        stations=[Station(id=f"o-{idx}", name=f"Ort {idx}", kilometer=60.0 * idx) for idx in range(3)],
+        segments=[TrackSegment(id="o-s1", km_start=0.0, km_end=120.0, speed_limit=limit_kmh)],
+    )
+
+
+def _baseline_times(route: Route, start: datetime, dwell_minutes: float):
+    """Arrival/departure pairs as the generator produced them before train categories."""
+    times = []
+    current = start
+    previous_km = None
+    for station in route.stations:
+        arrival = None
+        if previous_km is not None:
+            distance_km = max(station.kilometer - previous_km, 0.1)
+            arrival = current + timedelta(minutes=distance_km / route.estimated_speed_kmh * 60)
+            current = arrival
+        departure = arrival + timedelta(minutes=dwell_minutes) if arrival else start
+        times.append((arrival, departure if station is not route.stations[-1] else None))
+        previous_km = station.kilometer
+        current = departure
+    return times
+
+
+def test_categories_bring_their_own_stop_pattern():
+    westbahn = storage.get_route("wb")
+    stops = {
+        category_id: build_stop_plan(westbahn, get_category(category_id)).stops
+        for category_id in ("REX", "RJ", "RJX", "GZ")
+    }
+
+    assert stops["REX"] == (True, True, True, True, True)
+    assert stops["RJ"] == (True, True, True, False, True)
+    assert stops["RJX"] == (True, False, True, False, True)
+    assert stops["GZ"] == (True, False, False, False, True)
+
+
+def test_stop_rules_override_the_category_pattern():
+    westbahn = storage.get_route("wb")
+    plan = build_stop_plan(westbahn, get_category("RJX"), stop_rules=(("wb-2", 3.0), ("wb-3", None)))
+
+    # St. Pölten is now a stop, so Linz is passed by rule and Wels is far
+    # enough from St. Pölten to become a stop again.
+    assert plan.stops == (True, True, False, True, True)
+    assert plan.dwell_minutes[1] == 3.0
+
+
+def test_pass_through_stations_get_no_arrival_and_no_dwell():
+    westbahn = storage.get_route("wb")
+    timetable = generate_base_timetable(westbahn, START, category=get_category("RJX"))
+    passed = [entry for entry in timetable.entries if entry.pass_through]
+
+    assert [entry.station_id for entry in passed] == ["wb-2", "wb-4"]
+    for entry in passed:
+        assert entry.arrival is None
+        assert entry.departure is not None
+    plan = build_stop_plan(westbahn, get_category("RJX"))
+    assert plan.dwell_minutes[1] == plan.dwell_minutes[3] == 0.0
+
+
+@pytest.mark.parametrize(
+    "category_kmh, vehicle_kmh, limit_kmh, expected_kmh",
+    [(160, 230, 250, 160), (230, 140, 250, 140), (230, 230, 120, 120)],
+)
+def test_running_time_is_capped_at_vmax(category_kmh, vehicle_kmh, limit_kmh, expected_kmh):
+    category = _category(category_kmh, vehicle_kmh)
+    plan = build_stop_plan(_open_line(limit_kmh), category)
+
+    loss = ACCELERATION_LOSS_MINUTES[category.acceleration]
+    assert category.vmax_kmh == min(category_kmh, vehicle_kmh)
+    assert plan.run_minutes == pytest.approx((60 / expected_kmh * 60 + loss,) * 2)
+
+
+def test_acceleration_class_adds_its_loss_per_stop():
+    line = _open_line()
+    runs = {
+        acceleration: build_stop_plan(line, _category(acceleration=acceleration)).run_minutes
+        for acceleration in ACCELERATION_LOSS_MINUTES
+    }
+
+    # Both legs touch two stops, each costing half the class's loss.
+    for acceleration, loss in ACCELERATION_LOSS_MINUTES.items():
+        assert runs[acceleration][0] - runs["high"][0] == pytest.approx(loss - ACCELERATION_LOSS_MINUTES["high"])
+
+    passing = _category(acceleration="low")
+    plan = build_stop_plan(line, passing, stop_rules=(("o-1", None),))
+    assert plan.run_minutes[0] == pytest.approx(60 / 200 * 60 + ACCELERATION_LOSS_MINUTES["low"] / 2)
+
+
+@pytest.mark.parametrize("dwell_minutes", [2, 0, 4.5])
+def test_plan_without_category_matches_baseline(dwell_minutes):
+    route = synthetic_route(40)
+    timetable = generate_base_timetable(route, START, dwell_minutes)
+
+    assert timetable.train_number == f"{route.id.upper()}-001"
+    assert timetable.category_id is None
+    assert not any(entry.pass_through for entry in timetable.entries)
+    assert [(entry.arrival, entry.departure) for entry in timetable.entries] == _baseline_times(
+        route, START, dwell_minutes
+    )
+
+
+def test_train_numbers_do_not_advance_id_counters():
+    westbahn = storage.get_route("wb")
+    before = counter_state()
+
+    first = generate_base_timetable(westbahn, START, category=get_category("RJ"))
+    second = generate_base_timetable(westbahn, START, category=get_category("RJ"))
+
+    after = counter_state()
+    assert after["id_counters"] == {**before["id_counters"], "tt": before["id_counters"]["tt"] + 2}
+    rj = before["train_numbers"].get("RJ", get_category("RJ").number_base)
+    assert (first.train_number, second.train_number) == (f"RJ {rj}", f"RJ {rj + 1}")
+    assert after["train_numbers"]["RJ"] == rj + 2
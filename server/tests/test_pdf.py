@@ -0,0 +1,162 @@
+from collections import Counter
+from datetime import datetime
+
+import pytest
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from app.diagram import km_bounds, time_bounds
+from app.models import generate_base_timetable
+from app.pdf import _draw_grid, _draw_run_path, build_timetable_pdf
+from tools.synthetic import synthetic_route
+
+
+class _RecordingPath:
+    def __init__(self) -> None:
+        self.ops = []
+
+    def moveTo(self, x, y):
+        self.ops.append(("move", x, y))
+
+    def lineTo(self, x, y):
+        self.ops.append(("line", x, y))
+
+    def circle(self, x, y, radius):
+        self.ops.append(("circle", x, y, radius))
+
+
+class _RecordingText:
+    def __init__(self) -> None:
+        self.font = None
+        self.origin = None
+        self.runs = []
+
+    def setFont(self, name, size):
+        self.font = (name, size)
+
+    def setTextOrigin(self, x, y):
+        self.origin = (x, y)
+
+    def textOut(self, text):
+        self.runs.append((self.origin, self.font, text))
+
+
+class _RecordingCanvas:
+    """Stands in for a reportlab canvas and records what ends up on the page.
+
+    Paths are broken into single line segments and circles, and text into
+    left-aligned strings, each with the style in effect when it is drawn, so
+    one path per style and one call per primitive compare equal.
+    """
+
+    def __init__(self) -> None:
+        self.primitives = Counter()
+        self.draw_calls = 0
+        self.stroke = self.fill = None
+        self.width = 1.0
+        self.dash = ()
+        self.font = None
+
+    def setStrokeColor(self, color):
+        self.stroke = color.hexval()
+
+    def setFillColor(self, color):
+        self.fill = color.hexval()
+
+    def setLineWidth(self, width):
+        self.width = width
+
+    def setDash(self, pattern):
+        self.dash = tuple(pattern)
+
+    def setFont(self, name, size):
+        self.font = (name, size)
+
+    def stringWidth(self, text, font, size):
+        return stringWidth(text, font, size)
+
+    def rect(self, x, y, width, height, fill=False, stroke=True):
+        self.draw_calls += 1
+        self._add("rect", x, y, width, height, fill and self.fill, stroke and self._stroke_style())
+
+    def line(self, x1, y1, x2, y2):
+        self.draw_calls += 1
+        self._segment(x1, y1, x2, y2)
+
+    def circle(self, x, y, radius, stroke=1, fill=0):
+        self.draw_calls += 1
+        self._add("circle", x, y, radius, fill and self.fill, stroke and self._stroke_style())
+
+    def beginPath(self):
+        return _RecordingPath()
+
+    def drawPath(self, path, stroke=1, fill=0):
+        self.draw_calls += 1
+        current = None
+        for op, *args in path.ops:
+            if op == "move":
+                current = args
+            elif op == "line":
+                self._segment(*current, *args)
+                current = args
+            else:
+                self._add("circle", *args, fill and self.fill, stroke and self._stroke_style())
+
+    def drawCentredString(self, x, y, text):
+        self.draw_calls += 1
+        self._text(x - stringWidth(text, *self.font) / 2, y, self.font, text)
+
+    def drawRightString(self, x, y, text):
+        self.draw_calls += 1
+        self._text(x - stringWidth(text, *self.font), y, self.font, text)
+
+    def beginText(self):
+        return _RecordingText()
+
+    def drawText(self, text):
+        self.draw_calls += 1
+        for (x, y), font, run in text.runs:
+            self._text(x, y, font, run)
+
+    def _stroke_style(self):
+        return (self.stroke, self.width, self.dash)
+
+    def _segment(self, x1, y1, x2, y2):
+        self._add("line", *sorted([(x1, y1), (x2, y2)]), self._stroke_style())
+
+    def _text(self, x, y, font, text):
+        self._add("text", x, y, font, self.fill, text)
+
+    def _add(self, kind, *values):
+        self.primitives[(kind, *(round(value, 6) if isinstance(value, float) else value for value in values))] += 1
+
+
+def _draw(batched: bool) -> _RecordingCanvas:
+    route = synthetic_route(60)
+    timetable = generate_base_timetable(route, datetime(2024, 5, 1, 6, 0))
+    start_time, end_time = time_bounds(timetable)
+    min_km, max_km = km_bounds(route)
+    pdf = _RecordingCanvas()
+    _draw_grid(pdf, 200, 40, 800, 560, start_time, end_time, route, min_km, max_km, 192, batched)
+    station_index = {station.id: station for station in route.stations}
+    _draw_run_path(pdf, 200, 40, 800, 560, timetable, station_index, start_time, end_time, min_km, max_km, batched)
+    return pdf
+
+
+def test_batched_drawing_puts_the_same_primitives_on_the_page():
+    direct = _draw(batched=False)
+    batched = _draw(batched=True)
+
+    assert batched.primitives == direct.primitives
+    assert sum(direct.primitives.values()) > 300
+    assert batched.draw_calls * 10 < direct.draw_calls
+
+
+@pytest.mark.parametrize("compression", ["none", "flate"])
+def test_batched_pdf_is_smaller(compression):
+    route = synthetic_route(60)
+    timetable = generate_base_timetable(route, datetime(2024, 5, 1, 6, 0))
+
+    batched = build_timetable_pdf(timetable, route, compression=compression)
+    direct = build_timetable_pdf(timetable, route, compression=compression, batched=False)
+    assert batched.startswith(b"%PDF")
+    assert len(batched) < len(direct)
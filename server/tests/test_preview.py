@@ -0,0 +1,36 @@
+from datetime import datetime
+from xml.etree import ElementTree
+
+from app.models import Station, generate_base_timetable
+from app.preview import _route_layer, build_timetable_svg
+from tools.synthetic import synthetic_route
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+
+def test_svg_is_well_formed_and_escapes_station_names():
+    route = synthetic_route(12)
+    station = route.stations[3]
+    route.stations[3] = Station(id=station.id, name='Au & <Süd> "Nord"', kilometer=station.kilometer)
+    timetable = generate_base_timetable(route, datetime(2024, 5, 1, 6, 0))
+
+    root = ElementTree.fromstring(build_timetable_svg(timetable, route))
+
+    assert root.tag == f"{SVG}svg"
+    labels = [element.text for element in root.iter(f"{SVG}text")]
+    assert 'Au & <Süd> "Nord"' in labels
+    assert len(list(root.iter(f"{SVG}polyline"))) == 1
+
+
+def test_route_layer_is_reused_across_timetables():
+    route = synthetic_route(30, route_id="svg-cache")
+    first = generate_base_timetable(route, datetime(2024, 5, 1, 6, 0))
+    second = generate_base_timetable(route, datetime(2024, 5, 1, 8, 30), dwell_minutes=1)
+    _route_layer.cache_clear()
+
+    first_svg = build_timetable_svg(first, route)
+    second_svg = build_timetable_svg(second, route)
+
+    info = _route_layer.cache_info()
+    assert (info.misses, info.hits) == (1, 1)
+    assert first_svg != second_svg
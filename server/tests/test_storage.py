@@ -0,0 +1,74 @@
+import pytest
+
+from app import create_app
+from app import storage as storage_module
+from app.models import Route, Station
+from app.storage import InMemoryStorage
+
+THROUGH = {"from_station": "Wien Hbf", "to_station": "München Hbf"}
+
+
+@pytest.fixture
+def fresh_storage(monkeypatch):
+    """A storage of its own, so requests do not change the shared one."""
+    fresh = InMemoryStorage()
+    monkeypatch.setattr("app.routes.storage", fresh)
+    return fresh
+
+
+def test_through_timetable_validates_before_storing_the_route(fresh_storage):
+    client = create_app().test_client()
+    routes_before = len(fresh_storage.list_routes())
+
+    unknown_category = {**THROUGH, "start_time": "2024-05-01T08:00:00", "category_id": "ICE"}
+    response = client.post("/api/timetables/through", json=unknown_category)
+    assert response.status_code == 404
+    response = client.post("/api/timetables/through", json=THROUGH)
+    assert response.status_code == 400
+    assert len(fresh_storage.list_routes()) == routes_before
+
+
+def test_through_route_is_stored_as_a_copy(fresh_storage):
+    client = create_app().test_client()
+    response = client.post("/api/timetables/through", json={**THROUGH, "start_time": "2024-05-01T08:00:00"})
+    assert response.status_code == 201
+
+    network = fresh_storage.route_network()
+    composed = network.compose(network.find_path(THROUGH["from_station"], THROUGH["to_station"]))
+    stored = fresh_storage.get_route(response.get_json()["route_id"])
+    assert stored == composed
+    assert stored is not composed
+    assert stored.stations is not composed.stations
+    assert stored.segments is not composed.segments
+
+
+def test_through_requests_reuse_the_route_network(fresh_storage, monkeypatch):
+    builds = []
+    build_network = storage_module.build_network
+    monkeypatch.setattr(storage_module, "build_network", lambda routes: builds.append(1) or build_network(routes))
+    client = create_app().test_client()
+
+    for start_time in ("2024-05-01T08:00:00", "2024-05-01T09:00:00"):
+        response = client.post("/api/timetables/through", json={**THROUGH, "start_time": start_time})
+        assert response.status_code == 201
+    assert len(builds) == 1
+
+    fresh_storage.add_route(
+        Route(
+            id="muc-ros",
+            name="München – Rosenheim",
+            description="",
+            country="DE",
+            estimated_speed_kmh=140,
+            stations=[
+                Station(id="mr-1", name="München Hbf", kilometer=0.0),
+                Station(id="mr-2", name="Rosenheim", kilometer=64.6),
+            ],
+        )
+    )
+    response = client.post(
+        "/api/timetables/through",
+        json={"from_station": "Wien Hbf", "to_station": "Rosenheim", "start_time": "2024-05-01T10:00:00"},
+    )
+    assert response.status_code == 201
+    assert len(builds) == 2
@@ -0,0 +1,111 @@
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app import create_app
+from app.models import Route, Station, Timetable, TimetableEntry
+from app.storage import storage
+from app.validation import _overlapping_max, validate_timetable
+
+
+def test_app_starts_without_numpy():
+    code = "import sys, app; app.create_app(); assert 'numpy' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_overlapping_max_matches_pairwise_check():
+    rng = np.random.default_rng(7)
+    for _ in range(200):
+        a, b = rng.integers(0, 20, (2, 8)).astype(float)
+        seg_start, seg_end = np.minimum(a, b), np.maximum(a, b)
+        seg_limit = rng.integers(40, 200, 8).astype(float)
+        x, y = rng.uniform(-2, 22, (2, 30))
+        low, high = np.fmin(x, y), np.fmax(x, y)
+
+        overlaps = (seg_start[None, :] < high[:, None]) & (seg_end[None, :] > low[:, None])
+        expected = np.where(overlaps, seg_limit[None, :], -np.inf).max(axis=1)
+        assert np.array_equal(_overlapping_max(seg_start, seg_end, seg_limit, low, high), expected)
+
+
+def test_naive_times_ignore_the_local_timezone(monkeypatch):
+    monkeypatch.setenv("TZ", "Europe/Vienna")
+    time.tzset()
+    try:
+        route = Route(
+            id="dst",
+            name="DST",
+            description="",
+            country="AT",
+            estimated_speed_kmh=100,
+            stations=[Station(id="a", name="A", kilometer=0.0), Station(id="b", name="B", kilometer=10.0)],
+        )
+        # The 85 min stop spans the night local clocks jump from 02:00 to
+        # 03:00; read as local time it would shrink to 25 min.
+        timetable = Timetable(
+            id="dst",
+            route_id="dst",
+            train_number="1",
+            title="DST",
+            entries=[
+                TimetableEntry("a", "A", arrival=None, departure=datetime(2024, 3, 31, 1, 30)),
+                TimetableEntry("b", "B", arrival=datetime(2024, 3, 31, 1, 45), departure=datetime(2024, 3, 31, 3, 10)),
+            ],
+        )
+        assert [issue.code for issue in validate_timetable(timetable, route)] == ["dwell_too_long"]
+    finally:
+        monkeypatch.delenv("TZ")
+        time.tzset()
+
+
+def _edited_entries(**changes):
+    entries = [
+        {
+            "station_id": entry.station_id,
+            "station_name": entry.station_name,
+            "arrival": entry.arrival.isoformat() if entry.arrival else None,
+            "departure": entry.departure.isoformat() if entry.departure else None,
+        }
+        for entry in storage.get_timetable("tt-1").entries
+    ]
+    entries[1].update(changes)
+    return entries
+
+
+def test_put_rejects_mixed_timezones():
+    client = create_app().test_client()
+    before = storage.get_timetable("tt-1").entries
+    departure = datetime.fromisoformat(_edited_entries()[1]["departure"])
+
+    entries = _edited_entries(departure=departure.isoformat() + "+00:00")
+    response = client.put("/api/timetables/tt-1", json={"entries": entries})
+
+    assert response.status_code == 422
+    assert [issue["code"] for issue in response.get_json()["issues"]] == ["mixed_timezones"]
+    assert storage.get_timetable("tt-1").entries == before
+    assert client.get("/api/timetables/tt-1/preview.svg").status_code == 200
+
+
+def test_put_reports_unparseable_times_per_entry():
+    client = create_app().test_client()
+    response = client.put("/api/timetables/tt-1", json={"entries": _edited_entries(arrival="8 Uhr 15")})
+
+    assert response.status_code == 422
+    issues = response.get_json()["issues"]
+    assert [(issue["entry_index"], issue["code"]) for issue in issues] == [(1, "invalid_time")]
+
+
+def test_generation_rejects_dwell_times_validation_would_reject():
+    client = create_app().test_client()
+    base = {"route_id": "wb", "start_time": "2024-05-01T06:00:00"}
+    timetables_before = len(storage.list_timetables())
+
+    assert client.post("/api/timetables", json={**base, "dwell_minutes": 45}).status_code == 400
+    assert client.post("/api/timetables", json={**base, "stop_rules": {"wb-3": 31}}).status_code == 400
+    assert len(storage.list_timetables()) == timetables_before
+
+    response = client.post("/api/timetables", json={**base, "dwell_minutes": 30})
+    assert response.status_code == 201
+    assert client.get(f"/api/timetables/{response.get_json()['id']}/validation").get_json()["valid"]
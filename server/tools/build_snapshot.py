@@ -0,0 +1,30 @@
+"""Writes the bootstrap storage as a snapshot for fast worker start.
+
+Usage (from ``server/``)::
+
+    python -m tools.build_snapshot data/snapshot.pickle
+    BUCHFAHRPLAN_SNAPSHOT=data/snapshot.pickle gunicorn wsgi:app
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from typing import List
+
+from app.storage import storage
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    args = parser.parse_args(argv)
+
+    directory = os.path.dirname(args.path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    storage.save_snapshot(args.path)
+    print(f"{len(storage.routes)} Strecken, {len(storage.timetables)} Fahrpläne -> {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Compares the full and the compact timetable wire format.
+
+Pulls all timetables of a synthetic route through ``GET /api/timetables``
+in both formats and reports the payload size (plain and gzip) and the time
+a client needs to parse the response into ``Timetable`` objects.
+
+Usage (from ``server/``)::
+
+    python -m tools.compact_benchmark --stops 500 --timetables 50
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from app import create_app
+from app.compact import COMPACT_MIMETYPE, decode_timetable
+from app.models import Timetable, TimetableEntry, generate_base_timetable
+from app.storage import storage
+
+from .synthetic import synthetic_route
+
+
+def _parse_full(data: Dict[str, Any]) -> List[Timetable]:
+    def parse_time(value: Any) -> Any:
+        return datetime.fromisoformat(value) if value else None
+
+    return [
+        Timetable(
+            id=item["id"],
+            route_id=item["route_id"],
+            train_number=item["train_number"],
+            title=item["title"],
+            category_id=item["category_id"],
+            entries=[
+                TimetableEntry(
+                    station_id=entry["station_id"],
+                    station_name=entry["station_name"],
+                    arrival=parse_time(entry["arrival"]),
+                    departure=parse_time(entry["departure"]),
+                    track=entry["track"],
+                    remarks=entry["remarks"],
+                    pass_through=entry["pass_through"],
+                )
+                for entry in item["entries"]
+            ],
+        )
+        for item in data["timetables"]
+    ]
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stops", type=int, default=500)
+    parser.add_argument("--timetables", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    route = synthetic_route(args.stops, route_id="wire")
+    storage.add_route(route)
+    start = datetime(2024, 5, 1, 5, 0)
+    for idx in range(args.timetables):
+        storage.add_timetable(generate_base_timetable(route, start + timedelta(minutes=20 * idx)))
+
+    client = create_app().test_client()
+    url = f"/api/timetables?route_id={route.id}"
+    variants = {
+        "voll": (client.get(url).data, _parse_full),
+        "kompakt": (
+            client.get(url, headers={"Accept": COMPACT_MIMETYPE}).data,
+            lambda data: [decode_timetable(item, route) for item in data["timetables"]],
+        ),
+    }
+
+    print(f"{args.timetables} Fahrpläne × {args.stops} Halte")
+    print(f"{'Format':<10} {'Bytes':>12} {'gzip':>12} {'Parsen':>10}")
+    for label, (body, parse) in variants.items():
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            parse(json.loads(body))
+            timings.append(time.perf_counter() - started)
+        print(
+            f"{label:<10} {len(body):>10} B {len(gzip.compress(body)):>10} B "
+            f"{min(timings) * 1000:>7.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Measures bytes on the wire per content encoding for the main API responses.
+
+Runs the app in-process with the Flask test client on a synthetic route and
+reports, per endpoint and encoding, the response size and the compression
+time taken from the ``Server-Timing`` header.
+
+Usage (from ``server/``)::
+
+    python -m tools.compression_benchmark --stops 2000
+"""
+from __future__ import annotations
+
+import argparse
+import re
+from typing import List, Optional
+
+from app import create_app
+from app.storage import storage
+
+from .synthetic import synthetic_route, synthetic_timetable
+
+_ENCODINGS = ("identity", "gzip", "br")
+_TIMING_RE = re.compile(r"compress;dur=([\d.]+)")
+
+
+def _compress_ms(header: Optional[str]) -> Optional[float]:
+    match = _TIMING_RE.search(header or "")
+    return float(match.group(1)) if match else None
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stops", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    route = synthetic_route(args.stops, route_id="cmp")
+    storage.add_route(route)
+    timetable = storage.add_timetable(synthetic_timetable(route))
+
+    client = create_app().test_client()
+    endpoints = [
+        "/api/routes",
+        f"/api/timetables/{timetable.id}/pdf?compression=none",
+        f"/api/timetables/{timetable.id}/pdf",
+        f"/api/timetables/{timetable.id}/preview.svg",
+    ]
+
+    print(f"{args.stops} Halte, {len(timetable.entries)} Einträge")
+    print(f"{'Endpunkt':<48} {'Kodierung':<10} {'Bytes':>12} {'Kompression':>12}")
+    for endpoint in endpoints:
+        for encoding in _ENCODINGS:
+            response = client.get(endpoint, headers={"Accept-Encoding": encoding})
+            used = response.headers.get("Content-Encoding", "identity")
+            elapsed = _compress_ms(response.headers.get("Server-Timing"))
+            elapsed_text = f"{elapsed:.1f} ms" if elapsed is not None else "-"
+            print(f"{endpoint:<48} {used:<10} {len(response.data):>10} B {elapsed_text:>12}")
+
+
+if __name__ == "__main__":
+    main()
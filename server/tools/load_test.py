@@ -0,0 +1,331 @@
+"""Replays mixed API traffic against ``wsgi.py`` under gunicorn.
+
+For every worker/thread combination a local gunicorn (with the repo's
+``gunicorn.conf.py``) is started on a snapshot of synthetic routes and
+timetables. Client processes then send a weighted mix of requests in a
+closed loop for a fixed duration. Throughput and latency percentiles are
+reported per endpoint and written to a JSON file for later comparison.
+
+Usage (from ``server/``)::
+
+    python -m tools.load_test --workers 1,2,4 --threads 1,4 --duration 15
+    python -m tools.load_test --mix routes=6,create=2,update=1,pdf=1 --output results/peak.json
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.storage import DUMP_ENV, SNAPSHOT_ENV, storage
+
+from .synthetic import synthetic_route, synthetic_timetable
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ("routes", "create", "update", "pdf")
+DEFAULT_MIX = "routes=50,create=20,update=20,pdf=10"
+
+# (endpoint, HTTP status or 0 on connection errors, latency in ms)
+_Sample = Tuple[str, int, float]
+
+
+@dataclass
+class _Dataset:
+    route_ids: List[str]
+    # timetable ID -> PUT payload; these exist in every worker because they
+    # are part of the snapshot the app is preloaded from.
+    updates: Dict[str, Dict[str, Any]]
+
+
+@dataclass
+class _ClientJob:
+    port: int
+    seed: int
+    duration: float
+    mix: Dict[str, int]
+    dataset: _Dataset
+    accept_encoding: str
+
+
+@dataclass
+class EndpointStats:
+    requests: int
+    errors: int
+    throughput_rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix: Dict[str, int] = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unbekannter Endpunkt: {name}")
+        try:
+            mix[name] = int(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Ungültiges Gewicht für {name}: {weight!r}") from None
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("Mindestens ein Endpunkt braucht ein Gewicht > 0")
+    return mix
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def _build_snapshot(path: str, routes: int, stops: int, timetables: int) -> _Dataset:
+    dataset = _Dataset(route_ids=[], updates={})
+    for route_idx in range(routes):
+        route = synthetic_route(stops, route_id=f"load{route_idx + 1}", seed=route_idx + 1)
+        storage.add_route(route)
+        dataset.route_ids.append(route.id)
+        for tt_idx in range(timetables):
+            start = f"2024-01-01T{5 + tt_idx % 18:02d}:{(tt_idx * 7) % 60:02d}:00"
+            timetable = storage.add_timetable(synthetic_timetable(route, start_time=start))
+            dataset.updates[timetable.id] = {
+                "entries": [
+                    {
+                        "station_id": entry.station_id,
+                        "station_name": entry.station_name,
+                        "arrival": entry.arrival.isoformat() if entry.arrival else None,
+                        "departure": entry.departure.isoformat() if entry.departure else None,
+                        "track": str(1 + idx % 4),
+                        "remarks": None,
+                        "pass_through": entry.pass_through,
+                    }
+                    for idx, entry in enumerate(timetable.entries)
+                ]
+            }
+    storage.save_snapshot(path)
+    return dataset
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_gunicorn(port: int, workers: int, threads: int, snapshot_path: str, log_path: str) -> subprocess.Popen:
+    env = {key: value for key, value in os.environ.items() if key not in (DUMP_ENV, SNAPSHOT_ENV)}
+    env[SNAPSHOT_ENV] = snapshot_path
+    command = [
+        sys.executable, "-m", "gunicorn",
+        "--config", "gunicorn.conf.py",
+        "--bind", f"127.0.0.1:{port}",
+        "--workers", str(workers),
+        "--threads", str(threads),
+        "wsgi:app",
+    ]  # fmt: skip
+    with open(log_path, "ab") as log:
+        process = subprocess.Popen(command, cwd=SERVER_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn ist beendet (Code {process.returncode}), siehe {log_path}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/api/categories")
+            ready = connection.getresponse().status == 200
+            connection.close()
+            if ready:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.1)
+    _stop_gunicorn(process)
+    raise RuntimeError(f"gunicorn antwortet nicht auf Port {port}, siehe {log_path}")
+
+
+def _stop_gunicorn(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def _request(job: _ClientJob, rng: random.Random, endpoint: str) -> Tuple[str, str, Optional[bytes]]:
+    dataset = job.dataset
+    if endpoint == "routes":
+        return "GET", "/api/routes", None
+    if endpoint == "create":
+        payload = {
+            "route_id": rng.choice(dataset.route_ids),
+            "start_time": f"2024-01-01T{rng.randint(4, 22):02d}:{rng.randint(0, 59):02d}:00",
+        }
+        return "POST", "/api/timetables", json.dumps(payload).encode()
+    timetable_id = rng.choice(list(dataset.updates))
+    if endpoint == "update":
+        return "PUT", f"/api/timetables/{timetable_id}", json.dumps(dataset.updates[timetable_id]).encode()
+    return "GET", f"/api/timetables/{timetable_id}/pdf", None
+
+
+def _run_client(job: _ClientJob) -> List[_Sample]:
+    """One closed-loop client: sends the next request as soon as the last one is answered."""
+    rng = random.Random(job.seed)
+    names = [name for name in ENDPOINTS if job.mix.get(name)]
+    weights = [job.mix[name] for name in names]
+    headers = {"Content-Type": "application/json", "Accept-Encoding": job.accept_encoding}
+    connection = http.client.HTTPConnection("127.0.0.1", job.port, timeout=60)
+    samples: List[_Sample] = []
+    deadline = time.perf_counter() + job.duration
+    while time.perf_counter() < deadline:
+        endpoint = rng.choices(names, weights)[0]
+        method, path, body = _request(job, rng, endpoint)
+        started = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+            if response.getheader("Connection", "").lower() == "close":
+                connection.close()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            status = 0
+        samples.append((endpoint, status, (time.perf_counter() - started) * 1000))
+    connection.close()
+    return samples
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(samples: List[_Sample], duration: float) -> Dict[str, EndpointStats]:
+    groups: Dict[str, List[_Sample]] = {"total": samples}
+    for sample in samples:
+        groups.setdefault(sample[0], []).append(sample)
+
+    stats: Dict[str, EndpointStats] = {}
+    for name in [*ENDPOINTS, "total"]:
+        group = groups.get(name)
+        if not group:
+            continue
+        ordered = sorted(latency for _, _, latency in group)
+        stats[name] = EndpointStats(
+            requests=len(group),
+            errors=sum(1 for _, status, _ in group if not 200 <= status < 300),
+            throughput_rps=round(len(group) / duration, 1),
+            p50_ms=round(_percentile(ordered, 0.50), 1),
+            p95_ms=round(_percentile(ordered, 0.95), 1),
+            p99_ms=round(_percentile(ordered, 0.99), 1),
+            max_ms=round(ordered[-1], 1),
+        )
+    return stats
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=_int_list, default=[1, 2, 4], help="z.B. 1,2,4")
+    parser.add_argument("--threads", type=_int_list, default=[1, 4], help="z.B. 1,4")
+    parser.add_argument("--clients", type=int, default=8, help="gleichzeitige Client-Prozesse")
+    parser.add_argument("--duration", type=float, default=10.0, help="Sekunden je Kombination")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Sekunden Aufwärmlast vor jeder Messung")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument("--routes", type=int, default=3)
+    parser.add_argument("--stops", type=int, default=200)
+    parser.add_argument("--timetables", type=int, default=20, help="Fahrpläne je Strecke")
+    parser.add_argument("--accept-encoding", default="gzip, br")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="JSON-Datei (Standard: results/load_test_<Zeit>.json)")
+    args = parser.parse_args(argv)
+
+    started = datetime.now()
+    output = args.output or os.path.join("results", f"load_test_{started:%Y%m%d_%H%M%S}.json")
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = os.path.join(tmp, "snapshot.pickle")
+        log_path = os.path.join(tmp, "gunicorn.log")
+        dataset = _build_snapshot(snapshot_path, args.routes, args.stops, args.timetables)
+        print(
+            f"{args.routes} Strecken × {args.stops} Halte, {len(dataset.updates)} Fahrpläne, "
+            f"{args.clients} Clients, Mix {args.mix}"
+        )
+
+        with ProcessPoolExecutor(max_workers=args.clients) as pool:
+            for workers in args.workers:
+                for threads in args.threads:
+                    port = _free_port()
+                    process = _start_gunicorn(port, workers, threads, snapshot_path, log_path)
+                    try:
+                        jobs = [
+                            _ClientJob(port, args.seed + idx, args.warmup, args.mix, dataset, args.accept_encoding)
+                            for idx in range(args.clients)
+                        ]
+                        if args.warmup > 0:
+                            list(pool.map(_run_client, jobs))
+                        for job in jobs:
+                            job.duration = args.duration
+                        samples = [sample for batch in pool.map(_run_client, jobs) for sample in batch]
+                    finally:
+                        _stop_gunicorn(process)
+
+                    stats = summarize(samples, args.duration)
+                    results.append(
+                        {
+                            "workers": workers,
+                            "threads": threads,
+                            "endpoints": {name: asdict(entry) for name, entry in stats.items()},
+                        }
+                    )
+                    _print_stats(workers, threads, stats)
+
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump(
+            {
+                "started": started.isoformat(timespec="seconds"),
+                "config": {
+                    "clients": args.clients,
+                    "duration": args.duration,
+                    "mix": args.mix,
+                    "routes": args.routes,
+                    "stops": args.stops,
+                    "timetables": args.timetables,
+                    "accept_encoding": args.accept_encoding,
+                },
+                "results": results,
+            },
+            handle,
+            indent=2,
+        )
+    best = max(results, key=lambda result: result["endpoints"]["total"]["throughput_rps"])
+    print(f"Höchster Durchsatz mit {best['workers']} Workern × {best['threads']} Threads -> {output}")
+
+
+def _print_stats(workers: int, threads: int, stats: Dict[str, EndpointStats]) -> None:
+    print(f"\n{workers} Worker × {threads} Threads")
+    print(f"{'Endpunkt':<8} {'Anfr.':>7} {'Fehler':>7} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for name, entry in stats.items():
+        print(
+            f"{name:<8} {entry.requests:>7} {entry.errors:>7} {entry.throughput_rps:>8.1f} "
+            f"{entry.p50_ms:>5.1f} ms {entry.p95_ms:>5.1f} ms {entry.p99_ms:>5.1f} ms {entry.max_ms:>5.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Compares PDF content size and render time of the diagram drawing modes.
+
+Also times the SVG preview (cold and with cached route/time layers) as the
+reference for the live-preview latency.
+
+Usage (from ``server/``)::
+
+    python -m tools.pdf_benchmark --stops 5000 --repeat 3
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from typing import List
+
+from app.pdf import PDF_COMPRESSION_MODES, build_timetable_pdf
+from app.preview import build_timetable_svg
+
+from .synthetic import synthetic_route, synthetic_timetable
+
+_STREAM_RE = re.compile(rb"stream\r?\n(.*?)endstream", re.S)
+
+
+def _content_size(pdf_bytes: bytes) -> int:
+    streams = [len(match) for match in _STREAM_RE.findall(pdf_bytes)]
+    return max(streams) if streams else 0
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stops", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    route = synthetic_route(args.stops)
+    timetable = synthetic_timetable(route)
+
+    print(f"{args.stops} Halte, {len(timetable.entries)} Einträge")
+    print(f"{'Modus':<10} {'Kompression':<12} {'Content':>12} {'PDF':>12} {'Zeit':>10}")
+    for batched in (False, True):
+        for compression in PDF_COMPRESSION_MODES:
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                pdf_bytes = build_timetable_pdf(timetable, route, compression=compression, batched=batched)
+                timings.append(time.perf_counter() - started)
+            print(
+                f"{'batched' if batched else 'direct':<10} {compression:<12} "
+                f"{_content_size(pdf_bytes):>10} B {len(pdf_bytes):>10} B {min(timings) * 1000:>7.0f} ms"
+            )
+
+    for label in ("svg kalt", "svg warm"):
+        started = time.perf_counter()
+        svg = build_timetable_svg(timetable, route)
+        elapsed = time.perf_counter() - started
+        print(f"{label:<10} {'-':<12} {'-':>12} {len(svg.encode()):>10} B {elapsed * 1000:>7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
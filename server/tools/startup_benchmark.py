@@ -0,0 +1,68 @@
+"""Measures the cold start of ``wsgi.py`` in fresh interpreters.
+
+Usage (from ``server/``)::
+
+    python -m tools.startup_benchmark --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+from app.storage import SNAPSHOT_ENV
+
+from .build_snapshot import main as build_snapshot
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import wsgi
+print(json.dumps({
+    "ms": (time.perf_counter() - started) * 1000,
+    "reportlab": "reportlab" in sys.modules,
+}))
+"""
+
+
+def _probe(env: Dict[str, str]) -> Dict[str, object]:
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        capture_output=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = os.path.join(tmp, "snapshot.pickle")
+        build_snapshot([snapshot_path])
+        base_env = {key: value for key, value in os.environ.items() if key != SNAPSHOT_ENV}
+        variants = {
+            "bootstrap": base_env,
+            "snapshot": {**base_env, SNAPSHOT_ENV: snapshot_path},
+        }
+        print(f"{'Variante':<10} {'min':>9} {'median':>9}  reportlab geladen")
+        for name, env in variants.items():
+            runs = [_probe(env) for _ in range(args.repeat)]
+            timings = sorted(run["ms"] for run in runs)
+            print(
+                f"{name:<10} {timings[0]:>6.1f} ms {timings[len(timings) // 2]:>6.1f} ms  "
+                f"{'ja' if runs[0]['reportlab'] else 'nein'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
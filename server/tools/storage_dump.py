@@ -0,0 +1,81 @@
+"""Writes and inspects binary storage dumps (see ``app/dump.py``).
+
+Usage (from ``server/``)::
+
+    python -m tools.storage_dump export data/storage.bfpd
+    python -m tools.storage_dump export data/synthetic.bfpd --synthetic-routes 200 --stops 500
+    python -m tools.storage_dump info data/storage.bfpd
+    BUCHFAHRPLAN_DUMP=data/storage.bfpd gunicorn wsgi:app
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from typing import Iterator, List
+
+from app.dump import DumpReader, write_dump
+from app.models import Route, Timetable, counter_state
+
+from .synthetic import synthetic_route, synthetic_timetable
+
+
+def _synthetic_routes(count: int, stops: int) -> Iterator[Route]:
+    for idx in range(count):
+        yield synthetic_route(stops, route_id=f"syn{idx}", seed=idx)
+
+
+def _synthetic_timetables(count: int, stops: int) -> Iterator[Timetable]:
+    for route in _synthetic_routes(count, stops):
+        yield synthetic_timetable(route)
+
+
+def _export(args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    if args.synthetic_routes:
+        routes = _synthetic_routes(args.synthetic_routes, args.stops)
+        timetables = _synthetic_timetables(args.synthetic_routes, args.stops)
+    else:
+        from app.storage import storage
+
+        routes, timetables = storage.iter_routes(), storage.iter_timetables()
+    write_dump(args.path, routes, timetables, counter_state())
+    elapsed = time.perf_counter() - started
+    print(f"{args.path}: {os.path.getsize(args.path)} B in {elapsed * 1000:.0f} ms")
+
+
+def _info(args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    with DumpReader(args.path) as reader:
+        opened = time.perf_counter()
+        print(f"{reader.route_count} Strecken, {reader.timetable_count} Fahrpläne")
+        print(f"Öffnen: {(opened - started) * 1000:.2f} ms")
+        if reader.timetable_count:
+            timetable = next(reader.iter_timetables())
+            reader.get_timetable(timetable.id)
+            print(
+                f"Erster Fahrplan {timetable.id} ({len(timetable.entries)} Einträge) inkl. ID-Index: "
+                f"{(time.perf_counter() - opened) * 1000:.2f} ms"
+            )
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export")
+    export.add_argument("path")
+    export.add_argument("--synthetic-routes", type=int, default=0)
+    export.add_argument("--stops", type=int, default=100)
+    export.set_defaults(handler=_export)
+
+    info = commands.add_parser("info")
+    info.add_argument("path")
+    info.set_defaults(handler=_info)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
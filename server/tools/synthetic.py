@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime
+from typing import Optional
+
+from app.models import Route, Station, Timetable, TrackSegment, generate_base_timetable
+
+_SPEED_LIMITS = (80, 100, 120, 160, 200, 230)
+
+
+def synthetic_route(
+    stations: int,
+    route_id: str = "syn",
+    spacing_km: float = 2.5,
+    seed: Optional[int] = 1,
+) -> Route:
+    """Builds a long test route with evenly varying station spacing and segments."""
+    rng = random.Random(seed)
+    route = Route(
+        id=route_id,
+        name=f"Synthetische Strecke {route_id.upper()}",
+        description=f"{stations} Halte, generiert für Messungen",
+        country="AT",
+        estimated_speed_kmh=120,
+    )
+    kilometer = 0.0
+    for idx in range(1, stations + 1):
+        route.stations.append(Station(id=f"{route_id}-{idx}", name=f"Halt {idx}", kilometer=round(kilometer, 1)))
+        kilometer += spacing_km * rng.uniform(0.5, 1.5)
+
+    segment_start = 0.0
+    for idx, station in enumerate(route.stations[1:], start=1):
+        if idx % 10 and idx != len(route.stations) - 1:
+            continue
+        route.segments.append(
+            TrackSegment(
+                id=f"{route_id}-s{len(route.segments) + 1}",
+                km_start=segment_start,
+                km_end=station.kilometer,
+                speed_limit=rng.choice(_SPEED_LIMITS),
+                gradient=rng.randint(-8, 8),
+            )
+        )
+        segment_start = station.kilometer
+    return route
+
+
+def synthetic_timetable(route: Route, start_time: str = "2024-01-01T06:00:00", dwell_minutes: int = 1) -> Timetable:
+    return generate_base_timetable(route, datetime.fromisoformat(start_time), dwell_minutes)
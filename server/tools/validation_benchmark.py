@@ -0,0 +1,45 @@
+"""Times the bulk plausibility check over many synthetic timetables.
+
+Usage (from ``server/``)::
+
+    python -m tools.validation_benchmark --timetables 10000 --stops 20
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import timedelta
+from typing import List
+
+from app.validation import validate_timetables
+
+from .synthetic import synthetic_route, synthetic_timetable
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--timetables", type=int, default=10000)
+    parser.add_argument("--stops", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    route = synthetic_route(args.stops)
+    template = synthetic_timetable(route)
+    timetables = []
+    for idx in range(args.timetables):
+        timetable = synthetic_timetable(route, start_time=f"2024-01-01T{idx % 24:02d}:00:00")
+        if idx % 10 == 0 and len(timetable.entries) > 2:
+            # Every tenth timetable gets a leg that is far too fast.
+            timetable.entries[2].arrival = timetable.entries[1].departure + timedelta(seconds=10)
+        timetables.append(timetable)
+
+    started = time.perf_counter()
+    results = validate_timetables(timetables, {route.id: route})
+    elapsed = time.perf_counter() - started
+
+    flagged = sum(1 for issues in results.values() if issues)
+    entries = len(timetables) * len(template.entries)
+    print(f"{len(timetables)} Fahrpläne, {entries} Einträge geprüft in {elapsed * 1000:.0f} ms; {flagged} fehlerhaft")
+
+
+if __name__ == "__main__":
+    main()